@@ -0,0 +1,130 @@
+"""
+Approximate nearest-neighbour search for large galleries (pure NumPy IVF)
+"""
+
+import numpy as np
+
+# Rows per k-means training sample and per distance chunk
+TRAIN_POINTS_PER_LIST = 40
+CHUNK_ROWS = 4096
+
+
+class AnnConfig:
+    """Settings for the approximate gallery index.
+
+    min_size -- galleries with fewer students than this are searched exactly
+    nprobe   -- inverted lists scanned per query; higher is slower but closer to exact
+    nlist    -- number of inverted lists (0 picks about sqrt(rows))
+    """
+
+    def __init__(self, min_size=2000, nprobe=8, nlist=0):
+        if nprobe < 1:
+            raise ValueError(f"nprobe must be >= 1, got {nprobe}")
+        if nlist < 0:
+            raise ValueError(f"nlist must be >= 0, got {nlist}")
+        self.min_size = int(min_size)
+        self.nprobe = int(nprobe)
+        self.nlist = int(nlist)
+
+    def __repr__(self):
+        return f"AnnConfig(min_size={self.min_size}, nprobe={self.nprobe}, nlist={self.nlist})"
+
+
+def _nearest(data, centroids, centroid_sq_norms):
+    """Index of the closest centroid for every row, computed in chunks"""
+    assign = np.empty(len(data), dtype=np.intp)
+    for start in range(0, len(data), CHUNK_ROWS):
+        chunk = data[start:start + CHUNK_ROWS]
+        # |x|^2 is the same for every centroid, so it does not change the argmin
+        sq = centroid_sq_norms[None, :] - 2.0 * (chunk @ centroids.T)
+        assign[start:start + CHUNK_ROWS] = np.argmin(sq, axis=1)
+    return assign
+
+
+def kmeans(data, k, iterations=10, seed=0):
+    """Lloyd's k-means; returns a (k, dim) float32 centroid matrix"""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assign = _nearest(data, centroids, np.einsum("ij,ij->i", centroids, centroids))
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=k)
+        used = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)])[used]
+        centroids[used] = np.add.reduceat(data[order], starts, axis=0) / counts[used, None]
+        # Empty lists restart from a random row
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file index: rows are clustered by k-means and a query only scans
+    the ``nprobe`` clusters whose centroids are closest to it.
+
+    Several rows may belong to one owner (e.g. the prototypes of a student);
+    ``owners`` gives the owner of every row and searches return owners, each
+    at the distance of its closest scanned row. Results are approximate: an
+    owner whose rows all sit in unscanned clusters is missed.
+    """
+
+    def __init__(self, vectors, owners=None, nlist=0, nprobe=8, iterations=10, seed=0):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) == 0:
+            raise ValueError("Cannot build an index over an empty gallery")
+        owners = np.arange(len(vectors)) if owners is None else np.asarray(owners)
+
+        self.nlist = min(nlist or max(1, int(round(np.sqrt(len(vectors))))), len(vectors))
+        self.nprobe = min(nprobe, self.nlist)
+
+        # Centroids are trained on a sample; every row is then assigned to one
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), self.nlist * TRAIN_POINTS_PER_LIST)
+        sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+        self.centroids = kmeans(sample, self.nlist, iterations, seed)
+        self.centroid_sq_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+        assign = _nearest(vectors, self.centroids, self.centroid_sq_norms)
+
+        # Rows of list i are vectors[offsets[i]:offsets[i + 1]]
+        order = np.argsort(assign, kind="stable")
+        self.vectors = np.ascontiguousarray(vectors[order])
+        self.sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        self.owners = owners[order]
+        # The k best owners are always among the k * rows_per_owner best rows
+        self.rows_per_owner = int(np.unique(owners, return_counts=True)[1].max())
+        self.offsets = np.searchsorted(assign[order], np.arange(self.nlist + 1))
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, probes, k=1, nprobe=None):
+        """Closest owners of every probe; returns one (owners, distances) pair of
+        arrays per probe, best first, with up to k entries"""
+        probes = np.atleast_2d(np.asarray(probes, dtype=np.float32))
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+
+        centroid_sq = self.centroid_sq_norms[None, :] - 2.0 * (probes @ self.centroids.T)
+        if nprobe < self.nlist:
+            lists = np.argpartition(centroid_sq, nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            lists = np.broadcast_to(np.arange(self.nlist), (len(probes), self.nlist))
+
+        results = []
+        for probe, probe_lists in zip(probes, lists):
+            rows = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in probe_lists])
+            sq = self.sq_norms[rows] + probe @ probe - 2.0 * (self.vectors[rows] @ probe)
+            distances = np.sqrt(np.maximum(sq, 0.0))
+
+            # Best row of each owner, then the k best owners
+            candidates = k * self.rows_per_owner
+            if candidates < len(distances):
+                order = np.argpartition(distances, candidates - 1)[:candidates]
+                order = order[np.argsort(distances[order], kind="stable")]
+            else:
+                order = np.argsort(distances, kind="stable")
+            owners = self.owners[rows][order]
+            _, first = np.unique(owners, return_index=True)
+            best = np.sort(first)[:k]
+            results.append((owners[best], distances[order][best]))
+        return results
@@ -0,0 +1,168 @@
+"""
+In-memory index of today's attendance records
+"""
+
+import csv
+import glob
+import os
+import threading
+import time
+from datetime import datetime
+
+RECORD_FIELDS = ("RollNo", "Name", "Time", "Confidence", "Status")
+
+
+def safe_time_slot(time_slot):
+    """Time slot as it appears in attendance file names"""
+    return time_slot.replace(" ", "").replace(":", "-").replace("--", "-")
+
+
+class AttendanceIndex:
+    """Today's attendance records, kept in memory for the dashboard.
+
+    The index is filled from today's class attendance files the first time it
+    is used on a given day and is then updated by the attendance sessions on
+    every write, so queries are answered from memory. When several processes
+    (e.g. gunicorn workers) write attendance, set ``refresh_interval``: a
+    query then also reads what other processes appended to today's files,
+    at most once every ``refresh_interval`` seconds, tracking how far each
+    file has been read. Every record gets an increasing sequence number; ``records(since=n)`` returns only the records
+    added after cursor ``n``. The sequence does not restart at midnight, so a
+    cursor from yesterday stays valid.
+    """
+
+    def __init__(self, attendance_dir, refresh_interval=0):
+        self.attendance_dir = attendance_dir
+        self.refresh_interval = refresh_interval
+        self._last_scan = 0.0
+        self.date = None
+        self.cursor = 0
+        self._records = []
+        self._seen = set()  # (attendance file, roll number) pairs already indexed
+        self._sizes = {}  # attendance file -> bytes read so far
+        self._classes = {}  # attendance file -> class and time slot of its records
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def load_today(self):
+        """Load today's attendance files now instead of on the first query"""
+        with self._lock:
+            self._roll_over()
+
+    def _roll_over(self):
+        """Start a new index when the date changes and load today's files once"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        if today == self.date:
+            return
+        self.date = today
+        self._records = []
+        self._seen = set()
+        self._sizes = {}
+        self._classes = {}
+        self._scan()
+
+    def _scan(self):
+        """Index rows appended to today's files (by any process) since they were last read"""
+        self._last_scan = time.monotonic()
+        # Class files live in AttendanceFiles/department/year/division/date_timeslot.csv
+        pattern = os.path.join(self.attendance_dir, "*", "*", "*", f"{self.date}_*.csv")
+        for path in glob.glob(pattern):
+            self._read_new(path)
+
+    def _read_new(self, path, current_class=None):
+        offset = self._sizes.get(path, 0)
+        try:
+            with open(path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size == offset:
+                    return
+                # A shrunken file was rewritten; re-read it (indexed rows are skipped)
+                if size < offset:
+                    offset = 0
+                f.seek(offset)
+                data = f.read(size - offset)
+        except OSError as e:
+            print(f"[WARNING] Could not read attendance file {path}: {e}")
+            return
+        # A line another process is still writing is read next time
+        data = data[:data.rfind(b"\n") + 1]
+        self._sizes[path] = offset + len(data)
+        lines = data.decode("utf-8", errors="replace").splitlines()
+        if not lines:
+            return
+
+        if path not in self._classes:
+            first_line = lines[0] if lines and offset == 0 else ""
+            self._classes[path] = current_class or self._class_from_file(path, first_line)
+        for line in lines:
+            self._add_line(path, self._classes[path], line)
+
+    def _class_from_file(self, path, first_line):
+        """Class of an attendance file, from its header comment or else from its path"""
+        division_dir = os.path.dirname(path)
+        year_dir = os.path.dirname(division_dir)
+        current_class = {
+            "department": os.path.basename(os.path.dirname(year_dir)),
+            "year": os.path.basename(year_dir),
+            "division": os.path.basename(division_dir),
+            "time_slot": os.path.splitext(os.path.basename(path))[0].split("_", 1)[1],
+        }
+        # "# Department: X, Year: Y, Division: Z, Time Slot: T" keeps the original time slot
+        if first_line.startswith("# Department:") and "Time Slot:" in first_line:
+            current_class["time_slot"] = first_line.split("Time Slot:", 1)[1].strip()
+        return current_class
+
+    def _add_line(self, path, current_class, line):
+        line = line.strip()
+        if not line or line.startswith("#") or line.startswith("RollNo,"):
+            return
+        values = next(csv.reader([line]))
+        record = dict(zip(RECORD_FIELDS, (value.strip() for value in values)))
+        roll_no = record.get("RollNo")
+        if not roll_no or (path, roll_no) in self._seen:
+            return
+        self._seen.add((path, roll_no))
+        self.cursor += 1
+        record.update(current_class)
+        self._records.append((self.cursor, safe_time_slot(current_class["time_slot"]), record))
+
+    def add(self, attendance_file, current_class, line):
+        """Index one attendance CSV line written to (or found in) a class attendance file"""
+        if not current_class:
+            # The dated fallback files are not class attendance
+            return
+        with self._lock:
+            self._roll_over()
+            # Rows already in the file are indexed first, keeping the file's order
+            self._read_new(attendance_file, current_class)
+            self._add_line(attendance_file, current_class, line)
+
+    def records(self, department=None, year=None, division=None, time_slot=None, since=None):
+        """Today's records matching the given filters; returns (records, cursor)"""
+        with self._lock:
+            self._roll_over()
+            if self.refresh_interval > 0 and time.monotonic() - self._last_scan >= self.refresh_interval:
+                # Rows written by other processes
+                self._scan()
+            start = 0
+            if since is not None and self._records:
+                # Today's sequence numbers are consecutive, so the cursor maps to a position
+                start = min(max(0, since - self._records[0][0] + 1), len(self._records))
+            records = self._records[start:]
+            cursor = self.cursor
+
+        slot = safe_time_slot(time_slot) if time_slot else None
+        result = []
+        for seq, record_slot, record in records:
+            if department and record["department"] != department:
+                continue
+            if year and record["year"] != year:
+                continue
+            if division and record["division"] != division:
+                continue
+            if slot and record_slot != slot:
+                continue
+            result.append(record)
+        return result, cursor
@@ -0,0 +1,187 @@
+"""
+In-memory cache of open attendance sessions
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+@contextmanager
+def locked_file(f):
+    """Hold an exclusive OS-level lock on an open file.
+
+    This serializes appends from several server processes (e.g. a multi-worker
+    WSGI server) writing to the same attendance file.
+    """
+    if os.name == "nt":
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield f
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield f
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def roll_no_from_line(line):
+    """Roll number of an attendance CSV data line, or None for headers and blanks"""
+    line = line.strip()
+    if not line or line.startswith("#") or line.startswith("RollNo,"):
+        return None
+    return line.split(",", 1)[0].strip().strip('"')
+
+
+class AttendanceSession:
+    """Attendance state for one class and time slot on one day.
+
+    ``mark()`` is safe to call from several threads: the check of a roll
+    number happens under the session lock. With an ``AttendanceWriter`` the
+    row is queued and appended later in a batch; without one it is appended
+    right away. Appends hold an OS file lock, and rows appended by other
+    processes are picked up first, so a student another process already wrote
+    is not written again. Each new row, marked here or picked up from another
+    process, is passed to ``on_record(attendance_file, current_class, line)``
+    if given.
+    """
+
+    def __init__(self, attendance_file, current_class, marked_students, on_record=None, writer=None):
+        self.attendance_file = attendance_file
+        self.current_class = current_class
+        self.marked_students = marked_students
+        self.on_record = on_record
+        self.writer = writer
+        self.recognitions = 0
+        self.marked_count = 0
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+        self.known_size = os.path.getsize(attendance_file) if os.path.exists(attendance_file) else 0
+
+    def is_marked(self, roll_no):
+        with self.lock:
+            return roll_no in self.marked_students
+
+    def record_recognition(self):
+        with self.lock:
+            self.recognitions += 1
+
+    def mark(self, roll_no, line):
+        """Mark roll_no with line unless it is already marked; returns True if marked"""
+        with self.lock:
+            if roll_no in self.marked_students:
+                return False
+            if self.writer is not None:
+                self.writer.write(self, line)
+            elif not self._append([line], "flush"):
+                # Another process wrote this student first
+                return False
+            self.marked_students.add(roll_no)
+            self.marked_count += 1
+            self._notify(line)
+            return True
+
+    def append_lines(self, lines, durability="flush"):
+        """Append queued lines to the attendance file; returns the number written.
+
+        Lines for students that another process wrote in the meantime are dropped.
+        """
+        with self.lock:
+            return self._append(lines, durability)
+
+    def _append(self, lines, durability):
+        with open(self.attendance_file, "ab+") as f:
+            with locked_file(f):
+                synced = self._sync_from(f)
+                lines = [line for line in lines if roll_no_from_line(line) not in synced]
+                if lines:
+                    f.seek(0, os.SEEK_END)
+                    f.write("".join(lines).encode("utf-8"))
+                    if durability == "fsync":
+                        f.flush()
+                        os.fsync(f.fileno())
+                self.known_size = f.tell()
+        return len(lines)
+
+    def _sync_from(self, f):
+        """Add roll numbers that other processes appended since we last looked; returns them"""
+        synced = set()
+        size = f.seek(0, os.SEEK_END)
+        if size == self.known_size:
+            return synced
+        # A shrunken file was rewritten; re-read it from the start
+        f.seek(self.known_size if size > self.known_size else 0)
+        for raw in f.read().decode("utf-8", errors="replace").splitlines():
+            roll_no = roll_no_from_line(raw)
+            if roll_no:
+                synced.add(roll_no)
+                self.marked_students.add(roll_no)
+                self._notify(raw)
+        self.known_size = size
+        return synced
+
+    def _notify(self, line):
+        if self.on_record is not None:
+            try:
+                self.on_record(self.attendance_file, self.current_class, line)
+            except Exception as e:
+                print(f"[WARNING] Attendance record listener failed: {e}")
+
+
+class AttendanceSessionCache:
+    """LRU cache of attendance sessions keyed by (date, department, year, division, time_slot).
+
+    A session is opened from disk once and then served from memory. Because
+    the date is part of the key, a new day opens a new session. Sessions idle
+    for longer than ``idle_timeout`` seconds are dropped, and so are the least
+    recently used ones once more than ``max_sessions`` are open. The cache is
+    safe to share between request threads.
+    """
+
+    def __init__(self, idle_timeout=3600, max_sessions=256):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, key):
+        return key in self._sessions
+
+    def get(self, key, factory):
+        """Return the cached session for key, creating it with factory() on first use"""
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+
+            session = self._sessions.get(key)
+            if session is None:
+                session = factory()
+                self._sessions[key] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(key)
+            session.last_used = now
+            return session
+
+    def _evict_idle(self, now):
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.idle_timeout:
+                break
+            del self._sessions[key]
@@ -0,0 +1,114 @@
+"""
+Write-behind journal that batches attendance rows into their CSV files
+"""
+
+import threading
+import time
+
+DURABILITY_POLICIES = ("flush", "fsync")
+
+
+class AttendanceWriter:
+    """Queues attendance rows in memory and appends them to disk in batches.
+
+    A background thread writes the queued rows once ``max_batch`` rows are
+    pending or the oldest one has waited ``flush_interval`` seconds, so a
+    burst of marks costs one open/lock/append per attendance file instead of
+    one per student. ``durability`` is applied after every batch:
+
+    flush -- hand the rows to the OS (survives a crash of the server)
+    fsync -- also force them to disk (survives a power loss)
+
+    Each batch closes its files, so rows always reach the OS at least once per batch.
+
+    ``close()`` (also run by the server and the webcam loop on exit) drains
+    the queue before returning.
+    """
+
+    def __init__(self, durability="flush", max_batch=64, flush_interval=0.5):
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"Durability must be one of {DURABILITY_POLICIES}, got {durability!r}")
+        self.durability = durability
+        self.max_batch = max(1, max_batch)
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.batches = 0
+
+        self._pending = []
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="AttendanceWriter", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def write(self, session, line):
+        """Queue one CSV line for the session's attendance file"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Attendance writer is closed")
+            self._pending.append((session, line))
+            if len(self._pending) == 1:
+                # Start the flush_interval clock
+                self._oldest = time.monotonic()
+                self._cond.notify()
+            elif len(self._pending) >= self.max_batch:
+                self._cond.notify()
+
+    def flush(self):
+        """Write everything queued so far before returning"""
+        with self._cond:
+            batch, self._pending = self._pending, []
+            self._oldest = None
+        self._write_batch(batch)
+
+    def close(self):
+        """Stop the background thread after draining the queue"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if len(self._pending) >= self.max_batch:
+                        break
+                    if self._pending:
+                        remaining = self._oldest + self.flush_interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+                batch, self._pending = self._pending, []
+                self._oldest = None
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        if not batch:
+            return
+        # Group rows per session (one session per attendance file), keeping their order
+        by_session = {}
+        for session, line in batch:
+            by_session.setdefault(id(session), (session, []))[1].append(line)
+
+        # Serializes the background thread with explicit flush() calls
+        with self._flush_lock:
+            for session, lines in by_session.values():
+                try:
+                    written = session.append_lines(lines, self.durability)
+                    self.written += written
+                    print(f"[WRITE OK] {written} row(s) written to: {session.attendance_file}")
+                except Exception as e:
+                    print(f"[ERROR] Could not write to file {session.attendance_file}: {e}")
+            self.batches += 1
@@ -1,16 +1,11 @@
-import pickle
-import os
-
-ENCODINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "encodings.pkl")
+from encodings_store import load_encodings
 
 try:
-    with open(ENCODINGS_PATH, "rb") as f:
-        data = pickle.load(f)
-        if len(data) == 4:
-            known_encodings, known_names, baseline_encodings, student_class_info = data
-        else:
-            known_encodings, known_names, baseline_encodings = data
-            student_class_info = {}
+    data = load_encodings()
+    known_encodings = data.known_encodings
+    known_names = data.known_names
+    baseline_encodings = data.baseline_encodings
+    student_class_info = data.student_class_info
     
     print(f"Total encodings: {len(known_encodings)}")
     print(f"Unique students: {len(set(known_names))}")
@@ -0,0 +1,78 @@
+"""
+Face detection helpers shared by the recognition paths
+"""
+
+import cv2
+import face_recognition
+import numpy as np
+
+DETECTION_MODELS = ("hog", "cnn")
+
+
+class DetectionConfig:
+    """Settings for face detection.
+
+    scale    -- detect on a copy resized by this factor (0 < scale <= 1);
+                boxes are mapped back to full resolution for encoding
+    model    -- face_recognition detector, "hog" (CPU) or "cnn"
+    upsample -- number of times to upsample the image when looking for faces
+    """
+
+    def __init__(self, scale=1.0, model="hog", upsample=1):
+        if not 0 < scale <= 1:
+            raise ValueError(f"Detection scale must be in (0, 1], got {scale}")
+        if model not in DETECTION_MODELS:
+            raise ValueError(f"Detection model must be one of {DETECTION_MODELS}, got {model!r}")
+        if upsample < 0:
+            raise ValueError(f"Upsample count must be >= 0, got {upsample}")
+        self.scale = float(scale)
+        self.model = model
+        self.upsample = int(upsample)
+
+    def __repr__(self):
+        return f"DetectionConfig(scale={self.scale}, model={self.model!r}, upsample={self.upsample})"
+
+
+def detect_faces(rgb_frame, config=None):
+    """Return face boxes (top, right, bottom, left) in full-resolution coordinates"""
+    config = config or DetectionConfig()
+    if config.scale == 1.0:
+        return face_recognition.face_locations(
+            rgb_frame, number_of_times_to_upsample=config.upsample, model=config.model
+        )
+
+    small = cv2.resize(rgb_frame, (0, 0), fx=config.scale, fy=config.scale, interpolation=cv2.INTER_AREA)
+    locations = face_recognition.face_locations(
+        small, number_of_times_to_upsample=config.upsample, model=config.model
+    )
+
+    height, width = rgb_frame.shape[:2]
+    scaled = []
+    for top, right, bottom, left in locations:
+        scaled.append((
+            max(0, int(round(top / config.scale))),
+            min(width, int(round(right / config.scale))),
+            min(height, int(round(bottom / config.scale))),
+            max(0, int(round(left / config.scale))),
+        ))
+    return scaled
+
+
+def encode_faces(rgb_frame, locations):
+    """Compute 128-d encodings for known face boxes on the full-resolution frame"""
+    if not locations:
+        return []
+    return face_recognition.face_encodings(rgb_frame, locations)
+
+
+def warm_up(config=None):
+    """Run the detector and encoder once on a dummy frame so the first request is not slow"""
+    dummy = np.zeros((160, 160, 3), dtype=np.uint8)
+    detect_faces(dummy, config)
+    encode_faces(dummy, [(20, 140, 140, 20)])
+
+
+def detect_and_encode(rgb_frame, config=None):
+    """Detect faces and compute their 128-d encodings on the full-resolution frame"""
+    locations = detect_faces(rgb_frame, config)
+    return locations, encode_faces(rgb_frame, locations)
@@ -0,0 +1,56 @@
+"""
+Cosine-similarity gallery for the Keras embedding model
+"""
+
+import numpy as np
+
+
+def _normalize(vectors):
+    """L2-normalize rows; all-zero rows stay zero"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class EmbeddingGallery:
+    """Gallery embeddings L2-normalized once into a contiguous float32 matrix.
+
+    Rows of ``matrix`` line up with ``names``, so the cosine similarity of a
+    probe to every student is one matrix-vector product.
+    """
+
+    def __init__(self, names, vectors):
+        self.names = [str(name) for name in names]
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(self.names), -1)
+        self.matrix = np.ascontiguousarray(_normalize(vectors))
+
+    def __len__(self):
+        return len(self.names)
+
+    def similarities(self, embedding):
+        """Cosine similarity of one embedding to every gallery row"""
+        probe = _normalize(np.asarray(embedding, dtype=np.float32).ravel())
+        return self.matrix @ probe
+
+    def best_match(self, embedding):
+        """Return (name, similarity, similarities) of the closest student"""
+        sims = self.similarities(embedding)
+        best = int(np.argmax(sims))
+        return self.names[best], float(sims[best]), sims
+
+    def top_k(self, embedding, k=5):
+        """Return the k most similar students as (name, similarity), best first"""
+        sims = self.similarities(embedding)
+        k = min(k, len(sims))
+        if k == 0:
+            return []
+        best = np.argpartition(-sims, k - 1)[:k]
+        best = best[np.argsort(-sims[best], kind="stable")]
+        return [(self.names[i], float(sims[i])) for i in best]
+
+
+def load_gallery(vec_path: str, names_path: str):
+    """Load gallery_embeddings.npy and its names file into an EmbeddingGallery"""
+    vecs = np.load(vec_path)
+    names = np.load(names_path, allow_pickle=True)
+    return EmbeddingGallery(names, vecs)
@@ -0,0 +1,140 @@
+"""
+Optional worker-process pool for CPU-bound face detection and encoding
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# Detection settings of the current worker process, set by _init_worker
+_worker_detection = None
+
+
+# detection (cv2, dlib models) is imported inside the functions so that
+# importing this module stays cheap for the server process
+
+def _init_worker(scale, model, upsample):
+    global _worker_detection
+    from detection import DetectionConfig
+    _worker_detection = DetectionConfig(scale, model, upsample)
+
+
+def _detect_and_encode(rgb_frame):
+    from detection import detect_and_encode
+    return detect_and_encode(rgb_frame, _worker_detection)
+
+
+def _warm_up():
+    from detection import warm_up
+    warm_up(_worker_detection)
+    return os.getpid()
+
+
+class EncodingPoolError(RuntimeError):
+    """Base class for encoding pool failures that should be reported as overload"""
+
+
+class EncodingPoolBusy(EncodingPoolError):
+    """Raised when the pool already holds its maximum number of pending frames"""
+
+
+class EncodingTimeout(EncodingPoolError):
+    """Raised when a frame is not encoded within the pool timeout"""
+
+
+class EncodingWorkerCrashed(EncodingPoolError):
+    """Raised when a worker process died (e.g. out of memory) while a frame was queued"""
+
+
+class EncodingPool:
+    """Runs detection + encoding in worker processes so request threads only match.
+
+    At most ``max_pending`` frames are queued or running at once; a request
+    waits up to ``timeout`` seconds for a free slot and again for its result.
+    If a worker process dies, the frames it had queued fail with
+    EncodingWorkerCrashed and the pool is restarted for the next requests.
+    """
+
+    def __init__(self, workers=None, max_pending=None, timeout=10.0, detection=None):
+        if detection is None:
+            from detection import DetectionConfig
+            detection = DetectionConfig()
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._initargs = (detection.scale, detection.model, detection.upsample)
+        self._restart_lock = threading.Lock()
+        self.restarts = 0
+        self._executor = self._new_executor()
+
+    def _new_executor(self):
+        # The pool is started from a process that already runs threads (attendance
+        # writer, request threads), where fork can deadlock; spawn starts clean workers
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=self._initargs,
+        )
+
+    def _restart(self, broken):
+        """Replace a broken executor, once, however many requests noticed it"""
+        with self._restart_lock:
+            if self._executor is not broken:
+                return
+            self.restarts += 1
+            print(f"[WARNING] Encoding worker process died; restarting the pool (restart #{self.restarts})")
+            broken.shutdown(wait=False)
+            self._executor = self._new_executor()
+
+    def submit(self, rgb_frame):
+        """Queue one RGB frame; returns a future of (face_locations, face_encodings)"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise EncodingPoolBusy(f"Encoding queue is full ({self.max_pending} frames pending)")
+        executor = self._executor
+        try:
+            try:
+                future = executor.submit(_detect_and_encode, rgb_frame)
+            except Exception as e:
+                # Broken by an earlier crash (OSError while the executor is still
+                # tearing itself down), or shut down by another request's restart
+                # while this one was submitting; the frame goes to a fresh pool
+                if not isinstance(e, (BrokenProcessPool, OSError)) and self._executor is executor:
+                    raise
+                self._restart(executor)
+                executor = self._executor
+                future = executor.submit(_detect_and_encode, rgb_frame)
+        except Exception:
+            self._slots.release()
+            raise
+        # Remembered so a crash restarts the executor this frame was sent to
+        future.executor = executor
+        # The slot is freed when the worker finishes, even if the caller gave up
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def result(self, future):
+        """Wait for a submitted frame, raising EncodingTimeout after the pool timeout"""
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise EncodingTimeout(f"Face encoding timed out after {self.timeout}s")
+        except BrokenProcessPool:
+            self._restart(future.executor)
+            raise EncodingWorkerCrashed("Face encoding worker crashed; please retry")
+
+    def detect_and_encode(self, rgb_frame):
+        """Detect and encode one RGB frame in a worker process"""
+        return self.result(self.submit(rgb_frame))
+
+    def warm_up(self):
+        """Start the worker processes and load their models; returns how many distinct workers ran"""
+        futures = [self._executor.submit(_warm_up) for _ in range(self.workers)]
+        return len({future.result() for future in futures})
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
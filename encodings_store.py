@@ -0,0 +1,216 @@
+"""
+Versioned on-disk store for trained face encodings
+
+The store is a directory holding contiguous float32 matrices saved as .npy
+files (one row per face image, one row per student baseline and a few
+prototype rows per student) and a small meta.json with the names and class
+information. The matrices are memory-mapped on load, so loading stays fast
+and memory use stays flat as the gallery grows, and nothing is unpickled.
+"""
+
+import json
+import os
+import pickle
+
+import numpy as np
+
+FORMAT_VERSION = 2
+# Version 1 stores (no prototypes) are still read
+READABLE_VERSIONS = (1, 2)
+ENCODING_DIM = 128
+META_FILE = "meta.json"
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ENCODINGS_DIR = os.path.join(BASE_DIR, "encodings")
+LEGACY_ENCODINGS_PATH = os.path.join(BASE_DIR, "encodings.pkl")
+
+
+def class_sort_key(info):
+    """Order students by class, students without class info last"""
+    if info is None:
+        return (1, "", "", "")
+    return (0, info['department'], info['year'], info['division'])
+
+
+class EncodingsData:
+    """Trained encodings as loaded from the store.
+
+    known_encodings     -- (faces, 128) float32 matrix, rows line up with known_names
+    baseline_names      -- one name per row of baseline_matrix
+    baseline_matrix     -- (students, 128) float32 matrix of averaged encodings
+    student_class_info  -- name -> {department, year, division, roll_no}
+    prototype_matrix    -- (prototypes, 128) float32 matrix; each student's rows are
+                           contiguous and in baseline_names order (None without prototypes)
+    prototype_counts    -- number of prototype rows per baseline_names entry
+    source              -- file the data was read from (meta.json, or encodings.pkl when converting)
+    """
+
+    def __init__(self, known_encodings, known_names, baseline_names, baseline_matrix,
+                 student_class_info, source=None, prototype_matrix=None, prototype_counts=None):
+        self.known_encodings = known_encodings
+        self.known_names = known_names
+        self.baseline_names = baseline_names
+        self.baseline_matrix = baseline_matrix
+        self.student_class_info = student_class_info
+        self.prototype_matrix = prototype_matrix
+        self.prototype_counts = prototype_counts
+        self.source = source
+
+    @property
+    def baseline_encodings(self):
+        """name -> baseline row (views into baseline_matrix, nothing is copied)"""
+        return dict(zip(self.baseline_names, self.baseline_matrix))
+
+    @property
+    def prototypes(self):
+        """name -> prototype rows (views into prototype_matrix); empty without prototypes"""
+        if self.prototype_matrix is None:
+            return {}
+        offsets = np.concatenate([[0], np.cumsum(self.prototype_counts)])
+        return {name: self.prototype_matrix[offsets[i]:offsets[i + 1]]
+                for i, name in enumerate(self.baseline_names)}
+
+
+def meta_path(store_dir=ENCODINGS_DIR):
+    return os.path.join(store_dir, META_FILE)
+
+
+def _as_matrix(encodings):
+    if len(encodings) == 0:
+        return np.empty((0, ENCODING_DIM), dtype=np.float32)
+    return np.ascontiguousarray(np.stack([np.asarray(e) for e in encodings]), dtype=np.float32)
+
+
+def save_encodings(known_encodings, known_names, baseline_encodings, student_class_info,
+                   store_dir=ENCODINGS_DIR, prototypes=None):
+    """Write a new generation of the store; returns the path of its meta.json.
+
+    ``prototypes`` maps a student name to a (k, 128) array of representative
+    encodings; students without an entry get their baseline as the only one.
+
+    The matrices are written under new file names first and meta.json is
+    replaced last, so readers (and the server's file watcher) only ever see a
+    complete generation.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    previous = _read_meta(store_dir)
+    generation = previous["generation"] + 1 if previous else 1
+
+    # Baselines are stored in class order so the matcher can use the matrix as is
+    baseline_names = sorted(baseline_encodings, key=lambda n: class_sort_key(student_class_info.get(n)))
+    files = {
+        "encodings_file": f"encodings.{generation}.npy",
+        "baseline_file": f"baseline.{generation}.npy",
+        "prototypes_file": f"prototypes.{generation}.npy",
+    }
+    np.save(os.path.join(store_dir, files["encodings_file"]), _as_matrix(known_encodings))
+    np.save(os.path.join(store_dir, files["baseline_file"]),
+            _as_matrix([baseline_encodings[name] for name in baseline_names]))
+
+    prototypes = prototypes or {}
+    prototype_rows = []
+    prototype_counts = []
+    for name in baseline_names:
+        rows = prototypes.get(name)
+        rows = [baseline_encodings[name]] if rows is None or len(rows) == 0 else list(rows)
+        prototype_rows.extend(rows)
+        prototype_counts.append(len(rows))
+    np.save(os.path.join(store_dir, files["prototypes_file"]), _as_matrix(prototype_rows))
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "generation": generation,
+        "dim": ENCODING_DIM,
+        **files,
+        "known_names": list(known_names),
+        "baseline_names": baseline_names,
+        "prototype_counts": prototype_counts,
+        "student_class_info": student_class_info,
+    }
+    tmp_path = meta_path(store_dir) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, default=str)
+    os.replace(tmp_path, meta_path(store_dir))
+
+    if previous:
+        _remove_generation(store_dir, previous)
+    return meta_path(store_dir)
+
+
+def _remove_generation(store_dir, meta):
+    for key in ("encodings_file", "baseline_file", "prototypes_file"):
+        if key not in meta:
+            continue
+        try:
+            os.remove(os.path.join(store_dir, meta[key]))
+        except OSError:
+            # Still mapped by a running server (Windows) or already gone
+            pass
+
+
+def _read_meta(store_dir):
+    try:
+        with open(meta_path(store_dir), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_encodings(store_dir=ENCODINGS_DIR, legacy_path=LEGACY_ENCODINGS_PATH, mmap=True):
+    """Load the encodings store; nothing is ever unpickled here.
+
+    Raises FileNotFoundError when the store does not exist. A legacy
+    ``legacy_path`` pickle is only mentioned in the error: it must be
+    converted explicitly with ``python encodings_store.py`` (or retrained).
+    """
+    meta = _read_meta(store_dir)
+    if meta is None:
+        if os.path.exists(legacy_path):
+            raise FileNotFoundError(f"No encodings found in {store_dir}, only the legacy pickle {legacy_path}, "
+                                    "which is not loaded; convert it with 'python encodings_store.py' "
+                                    "or retrain with 'python train.py'")
+        raise FileNotFoundError(f"No encodings found in {store_dir} (run train.py first)")
+
+    if meta.get("format_version") not in READABLE_VERSIONS:
+        raise ValueError(f"Unsupported encodings format version {meta.get('format_version')} "
+                         f"(expected one of {READABLE_VERSIONS})")
+    mmap_mode = "r" if mmap else None
+    known_encodings = np.load(os.path.join(store_dir, meta["encodings_file"]), mmap_mode=mmap_mode)
+    baseline_matrix = np.load(os.path.join(store_dir, meta["baseline_file"]), mmap_mode=mmap_mode)
+    if len(known_encodings) != len(meta["known_names"]) or len(baseline_matrix) != len(meta["baseline_names"]):
+        raise ValueError(f"Encodings store in {store_dir} is inconsistent with its {META_FILE}")
+
+    prototype_matrix = prototype_counts = None
+    if "prototypes_file" in meta:
+        prototype_matrix = np.load(os.path.join(store_dir, meta["prototypes_file"]), mmap_mode=mmap_mode)
+        prototype_counts = meta["prototype_counts"]
+        if len(prototype_counts) != len(baseline_matrix) or sum(prototype_counts) != len(prototype_matrix):
+            raise ValueError(f"Prototypes in {store_dir} are inconsistent with its {META_FILE}")
+
+    return EncodingsData(known_encodings, meta["known_names"], meta["baseline_names"], baseline_matrix,
+                         meta["student_class_info"], source=meta_path(store_dir),
+                         prototype_matrix=prototype_matrix, prototype_counts=prototype_counts)
+
+
+def _load_legacy_pickle(path):
+    # Only for the explicit conversion below: unpickling can run arbitrary code
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+    # Handle both old (3-tuple) and new (4-tuple) pickles
+    if len(data) == 4:
+        known_encodings, known_names, baseline_encodings, student_class_info = data
+    else:
+        known_encodings, known_names, baseline_encodings = data
+        student_class_info = {}
+    baseline_names = list(baseline_encodings)
+    return EncodingsData(_as_matrix(known_encodings), list(known_names), baseline_names,
+                         _as_matrix([baseline_encodings[name] for name in baseline_names]),
+                         student_class_info, source=path)
+
+
+if __name__ == "__main__":
+    # Convert an existing encodings.pkl without retraining
+    data = _load_legacy_pickle(LEGACY_ENCODINGS_PATH)
+    path = save_encodings(data.known_encodings, data.known_names, data.baseline_encodings,
+                          data.student_class_info)
+    print(f"[INFO] Converted {len(data.known_names)} encodings of {len(data.baseline_names)} students to {path}")
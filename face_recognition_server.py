@@ -1,7 +1,13 @@
 import os
+import json
+import threading
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from recognize import FaceRecognitionSystem
+from encoding_pool import EncodingPool, EncodingPoolError
+from attendance_writer import AttendanceWriter
+from gallery_watcher import GalleryWatcher
+import atexit
+import time
 import logging
 
 app = Flask(__name__)
@@ -11,53 +17,313 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global face recognition system instance
+# Config via env vars (or defaults)
+SESSION_IDLE_TIMEOUT = int(os.environ.get('FR_SESSION_IDLE_TIMEOUT', 3600))
+DETECTION_SCALE = float(os.environ.get('FR_DETECTION_SCALE', 1.0))
+DETECTION_MODEL = os.environ.get('FR_DETECTION_MODEL', 'hog')
+DETECTION_UPSAMPLE = int(os.environ.get('FR_DETECTION_UPSAMPLE', 1))
+MAX_BATCH_FRAMES = int(os.environ.get('FR_MAX_BATCH_FRAMES', 32))
+# Optional process pool for detection + encoding (FR_ENCODING_POOL=1 to enable)
+ENCODING_POOL_ENABLED = os.environ.get('FR_ENCODING_POOL', '0') == '1'
+ENCODING_WORKERS = int(os.environ.get('FR_ENCODING_WORKERS', 0)) or os.cpu_count() or 1
+ENCODING_MAX_PENDING = int(os.environ.get('FR_ENCODING_MAX_PENDING', 0)) or ENCODING_WORKERS * 4
+ENCODING_TIMEOUT = float(os.environ.get('FR_ENCODING_TIMEOUT', 10))
+# Seconds between checks of the encodings store/students.csv for automatic reload (0 = off)
+WATCH_INTERVAL = float(os.environ.get('FR_WATCH_INTERVAL', 0))
+# Attendance rows are written in batches: durability flush|fsync, max rows
+# per batch and max seconds a row waits in memory
+ATTENDANCE_DURABILITY = os.environ.get('FR_ATTENDANCE_DURABILITY', 'flush')
+ATTENDANCE_BATCH = int(os.environ.get('FR_ATTENDANCE_BATCH', 64))
+ATTENDANCE_FLUSH_INTERVAL = float(os.environ.get('FR_ATTENDANCE_FLUSH_INTERVAL', 0.5))
+# With several server processes, /attendance/today also reads rows the others wrote,
+# at most once every this many seconds (0 = single process, answer from memory only)
+ATTENDANCE_REFRESH_INTERVAL = float(os.environ.get('FR_ATTENDANCE_REFRESH_INTERVAL', 0))
+# Approximate whole-gallery search (FR_ANN=1 to enable) for galleries of at least
+# FR_ANN_MIN_SIZE students; FR_ANN_NPROBE trades speed for accuracy
+ANN_ENABLED = os.environ.get('FR_ANN', '0') == '1'
+ANN_MIN_SIZE = int(os.environ.get('FR_ANN_MIN_SIZE', 2000))
+ANN_NPROBE = int(os.environ.get('FR_ANN_NPROBE', 8))
+ANN_NLIST = int(os.environ.get('FR_ANN_NLIST', 0))
+# Seconds a request waits for startup to finish before getting HTTP 503
+READY_TIMEOUT = float(os.environ.get('FR_READY_TIMEOUT', 30))
+
+# Global face recognition system instance. The gallery it holds is read-only
+# while serving; per-class attendance state lives in per-request sessions.
 face_recognition_system = None
+encoding_pool = None
+gallery_watcher = None
+_init_lock = threading.Lock()
+
+# Startup progress, reported by /health and /ready
+startup_state = {'state': 'stopped', 'error': None, 'timings': {}}
+startup_done = threading.Event()
+_startup_lock = threading.Lock()
 
 def initialize_system():
-    """Initialize the face recognition system"""
+    """Initialize the face recognition system (once, even under concurrent requests)"""
     global face_recognition_system
+    with _init_lock:
+        if face_recognition_system is not None:
+            return True
+        return _create_system()
+
+def start_background_init():
+    """Start loading and warming the system in a background thread, if not already running"""
+    with _startup_lock:
+        if startup_state['state'] in ('starting', 'ready'):
+            return
+        startup_state['state'] = 'starting'
+        startup_done.clear()
+    threading.Thread(target=initialize_system, name='SystemInit', daemon=True).start()
+
+def wait_until_ready():
+    """Make sure startup is underway and wait up to READY_TIMEOUT for it to finish"""
+    if face_recognition_system is None:
+        start_background_init()
+        startup_done.wait(READY_TIMEOUT)
+    return face_recognition_system is not None
+
+def _create_system():
+    global face_recognition_system, encoding_pool
+    startup_state['state'] = 'starting'
+    timings = {}
     try:
-        face_recognition_system = FaceRecognitionSystem()
-        logger.info("Face recognition system initialized successfully")
+        # Heavy imports (cv2, dlib models, pandas) happen here, not at server import
+        start = time.time()
+        from recognize import FaceRecognitionSystem
+        from detection import DetectionConfig
+        from ann_index import AnnConfig
+        timings['imports'] = round(time.time() - start, 3)
+        
+        start = time.time()
+        detection = DetectionConfig(DETECTION_SCALE, DETECTION_MODEL, DETECTION_UPSAMPLE)
+        writer = AttendanceWriter(ATTENDANCE_DURABILITY, ATTENDANCE_BATCH, ATTENDANCE_FLUSH_INTERVAL)
+        ann = AnnConfig(ANN_MIN_SIZE, ANN_NPROBE, ANN_NLIST) if ANN_ENABLED else None
+        system = FaceRecognitionSystem(
+            session_idle_timeout=SESSION_IDLE_TIMEOUT,
+            detection=detection,
+            attendance_writer=writer,
+            ann=ann,
+            attendance_refresh_interval=ATTENDANCE_REFRESH_INTERVAL
+        )
+        # Queued attendance rows are written out before the process exits
+        atexit.register(system.close)
+        timings['load_gallery'] = round(time.time() - start, 3)
+        logger.info(f"Face detection settings: {detection}")
+        
+        # The worker pool outlives reloads; it only holds detection settings
+        if ENCODING_POOL_ENABLED and encoding_pool is None:
+            encoding_pool = EncodingPool(ENCODING_WORKERS, ENCODING_MAX_PENDING, ENCODING_TIMEOUT, detection)
+            atexit.register(encoding_pool.shutdown)
+            logger.info(f"Encoding pool started with {encoding_pool.workers} workers "
+                        f"(max {encoding_pool.max_pending} pending, {ENCODING_TIMEOUT}s timeout)")
+        system.encoding_pool = encoding_pool
+        
+        # Run the detector and encoder once so the first real request is fast
+        start = time.time()
+        system.warm_up()
+        timings['warm_up'] = round(time.time() - start, 3)
+        timings['total'] = round(sum(timings.values()), 3)
+        
+        face_recognition_system = system
+        startup_state.update(state='ready', error=None, timings=timings)
+        startup_done.set()
+        logger.info(f"Face recognition system initialized successfully in {timings['total']}s "
+                    f"(imports {timings['imports']}s, gallery {timings['load_gallery']}s, "
+                    f"warm-up {timings['warm_up']}s)")
+        
+        if WATCH_INTERVAL > 0:
+            start_gallery_watcher(system)
         return True
     except Exception as e:
+        startup_state.update(state='failed', error=str(e), timings=timings)
+        # Wake waiting requests; the next request retries the startup
+        startup_done.set()
         logger.error(f"Failed to initialize face recognition system: {e}")
         return False
 
+def reload_gallery():
+    """Build a new gallery and swap it in; the current one keeps serving until then"""
+    start = time.time()
+    gallery = face_recognition_system.reload_data()
+    logger.info(f"Gallery reloaded in {time.time() - start:.2f}s "
+                f"({len(gallery.known_names)} encodings, {len(gallery.students.students_df)} students)")
+    return gallery
+
+def start_gallery_watcher(system):
+    """Reload automatically when train.py rewrites the encodings or students change"""
+    global gallery_watcher
+    if gallery_watcher is not None:
+        gallery_watcher.stop()
+    gallery_watcher = GalleryWatcher([system.ENCODINGS_META, system.STUDENTS_CSV], reload_gallery, WATCH_INTERVAL)
+    gallery_watcher.start()
+    logger.info(f"Watching encodings and students files every {WATCH_INTERVAL}s")
+
+def _reload_in_background():
+    try:
+        reload_gallery()
+    except Exception as e:
+        logger.error(f"Background reload failed: {e}")
+
+META_FIELDS = ('department', 'year', 'division', 'time_slot', 'teacher_id', 'subject')
+
+def is_truthy(value):
+    """Interpret a flag sent as JSON, a form field or a header"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+def read_form_meta():
+    """Meta of a multipart request, from one JSON "meta" field or separate form fields.
+    
+    Returns (meta, error).
+    """
+    if not request.form.get('meta'):
+        return {field: request.form[field] for field in META_FIELDS if request.form.get(field)}, None
+    try:
+        meta = json.loads(request.form['meta'])
+    except ValueError:
+        return {}, 'Invalid meta'
+    if not isinstance(meta, dict):
+        return {}, 'Invalid meta'
+    return meta, None
+
+def read_recognition_request():
+    """Read the image and meta of a recognition request.
+    
+    Accepts a raw image body (image/jpeg, image/png) with meta in X-Department,
+    X-Year, X-Division, X-Time-Slot and X-Group headers, a multipart upload with
+    an "image" file and meta as form fields (or one JSON "meta" field), or the
+    original JSON body with a base64 "image_data" data URL.
+    
+    Returns (frame, meta, group, error).
+    """
+    mimetype = request.mimetype or ''
+    
+    if mimetype.startswith('image/'):
+        # Decode straight from the request buffer, no base64 or string copies
+        frame = face_recognition_system.decode_image_bytes(request.get_data(cache=False))
+        meta = {}
+        for field in META_FIELDS:
+            value = request.headers.get('X-' + field.replace('_', '-').title())
+            if value:
+                meta[field] = value
+        return frame, meta, is_truthy(request.headers.get('X-Group')), None
+    
+    if mimetype == 'multipart/form-data':
+        upload = request.files.get('image')
+        if upload is None:
+            return None, {}, False, 'No image data provided'
+        meta, error = read_form_meta()
+        if error:
+            return None, {}, False, error
+        frame = face_recognition_system.decode_image_bytes(upload.read())
+        group = is_truthy(request.form.get('group') or meta.get('group'))
+        return frame, meta, group, None
+    
+    data = request.get_json(silent=True)
+    if not data or 'image_data' not in data:
+        return None, {}, False, 'No image data provided'
+    meta = data.get('meta', {})
+    if not isinstance(meta, dict):
+        return None, {}, False, 'Invalid meta'
+    # Group mode marks every face in the frame instead of only the first
+    group = is_truthy(data.get('group') or meta.get('group'))
+    return face_recognition_system.decode_base64_image(data['image_data']), meta, group, None
+
+def read_batch_request():
+    """Read the frames and shared meta of a batch recognition request.
+    
+    Accepts a multipart upload with several "image" files and meta as form
+    fields (or one JSON "meta" field), or a JSON body with a "frames" list of
+    base64 data URLs and one "meta" block. Batches of more than
+    MAX_BATCH_FRAMES frames are rejected before any frame is decoded.
+    
+    Returns (frames, meta, group, error).
+    """
+    if request.mimetype == 'multipart/form-data':
+        uploads = request.files.getlist('image')
+        if not uploads:
+            return [], {}, False, 'No image data provided'
+        if len(uploads) > MAX_BATCH_FRAMES:
+            return [], {}, False, f'Too many frames (max {MAX_BATCH_FRAMES})'
+        meta, error = read_form_meta()
+        if error:
+            return [], {}, False, error
+        frames = [face_recognition_system.decode_image_bytes(upload.read()) for upload in uploads]
+        return frames, meta, is_truthy(request.form.get('group') or meta.get('group')), None
+    
+    data = request.get_json(silent=True)
+    if not data or not data.get('frames'):
+        return [], {}, False, 'No image data provided'
+    if not isinstance(data['frames'], list):
+        return [], {}, False, "'frames' must be a list of images"
+    if len(data['frames']) > MAX_BATCH_FRAMES:
+        return [], {}, False, f'Too many frames (max {MAX_BATCH_FRAMES})'
+    meta = data.get('meta', {})
+    if not isinstance(meta, dict):
+        return [], {}, False, 'Invalid meta'
+    frames = [face_recognition_system.decode_base64_image(image_data) for image_data in data['frames']]
+    return frames, meta, is_truthy(data.get('group') or meta.get('group')), None
+
+def format_face_result(result):
+    """Format one recognition result to match the expected frontend format"""
+    response = {
+        'name': result['name'],
+        'roll_no': result['roll_no'],
+        'similarity': result['confidence'] / 100.0,  # Convert to 0-1 scale
+        'confidence': result['confidence'],
+        'decision': result['decision'],
+        'status': result['status'],
+        'attendance_marked': result['attendance_marked'],
+        'already_marked': result['already_marked']
+    }
+    if 'box' in result:
+        response['box'] = result['box']
+    return response
+
 @app.route('/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
+    """Liveness check; answers immediately and never triggers the (slow) startup"""
     try:
-        if face_recognition_system is None:
-            if not initialize_system():
-                return jsonify({'ok': False, 'error': 'System not initialized'}), 500
-        
-        return jsonify({
+        system = face_recognition_system
+        response = {
             'ok': True, 
             'message': 'Face Recognition Server is running',
-            'students_loaded': len(face_recognition_system.students_df),
-            'encodings_loaded': len(face_recognition_system.known_names)
-        }), 200
+            'ready': system is not None,
+            'state': startup_state['state']
+        }
+        if system is not None:
+            response['students_loaded'] = len(system.students_df)
+            response['encodings_loaded'] = len(system.known_names)
+        return jsonify(response), 200
     except Exception as e:
         return jsonify({'ok': False, 'error': str(e)}), 500
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness check: 200 once models are loaded and warmed up, 503 before that"""
+    if face_recognition_system is None:
+        start_background_init()
+        return jsonify({
+            'ready': False,
+            'state': startup_state['state'],
+            'error': startup_state['error']
+        }), 503
+    return jsonify({'ready': True, 'state': 'ready', 'timings': startup_state['timings']}), 200
+
 @app.route('/recognize', methods=['POST'])
 def recognize():
     """Face recognition endpoint"""
     try:
-        # Initialize system if not already done
-        if face_recognition_system is None:
-            if not initialize_system():
-                return jsonify({'success': False, 'error': 'System not initialized'}), 500
-        
-        # Get request data
-        data = request.get_json()
-        if not data or 'image_data' not in data:
-            return jsonify({'success': False, 'error': 'No image data provided'}), 400
+        # Wait for startup if the models are still loading
+        if not wait_until_ready():
+            return jsonify({'success': False, 'error': 'System not ready'}), 503
         
-        image_data = data['image_data']
-        meta = data.get('meta', {})
+        # Get request data (raw image body, multipart upload or base64 JSON)
+        frame, meta, group, error = read_recognition_request()
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
         # Extract class information and time slot from meta
         department = meta.get('department')
@@ -66,50 +332,120 @@ def recognize():
         time_slot = meta.get('time_slot')
         
         # Perform face recognition with class filtering and time slot
-        result = face_recognition_system.recognize_face_from_image(
-            image_data, 
+        result = face_recognition_system.recognize_face_from_frame(
+            frame, 
             department=department, 
             year=year, 
             division=division,
-            time_slot=time_slot
+            time_slot=time_slot,
+            group=group
         )
         
         if not result['success']:
             return jsonify(result), 400
         
+        if group:
+            response = {
+                'success': True,
+                'faces': [format_face_result(face) for face in result['faces']],
+                'face_count': result['face_count'],
+                'marked_count': result['marked_count'],
+                'meta': meta
+            }
+            logger.info(f"Group recognition: {result['face_count']} faces, {result['marked_count']} marked")
+            return jsonify(response), 200
+        
         # Format response to match expected frontend format
-        response = {
-            'success': True,
-            'name': result['name'],
-            'roll_no': result['roll_no'],
-            'similarity': result['confidence'] / 100.0,  # Convert to 0-1 scale
-            'confidence': result['confidence'],
-            'decision': result['decision'],
-            'status': result['status'],
-            'attendance_marked': result['attendance_marked'],
-            'already_marked': result['already_marked'],
-            'meta': meta
-        }
+        response = format_face_result(result)
+        response['success'] = True
+        response['meta'] = meta
         
         logger.info(f"Recognition result: {result['name']} ({result['confidence']}%) - {result['status']}")
         
         return jsonify(response), 200
         
+    except EncodingPoolError as e:
+        logger.warning(f"Recognition rejected: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 503
     except Exception as e:
         logger.error(f"Recognition error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/recognize/batch', methods=['POST'])
+def recognize_batch():
+    """Recognize several frames that share one class and time slot in one request"""
+    try:
+        if not wait_until_ready():
+            return jsonify({'success': False, 'error': 'System not ready'}), 503
+        
+        frames, meta, group, error = read_batch_request()
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+        
+        # Faces from all frames are matched together and each student is marked once
+        results = face_recognition_system.recognize_faces_from_frames(
+            frames,
+            department=meta.get('department'),
+            year=meta.get('year'),
+            division=meta.get('division'),
+            time_slot=meta.get('time_slot'),
+            group=group
+        )
+        
+        frame_results = []
+        marked_count = 0
+        for result in results:
+            if not result['success']:
+                frame_results.append(result)
+            elif group:
+                marked_count += result['marked_count']
+                frame_results.append({
+                    'success': True,
+                    'faces': [format_face_result(face) for face in result['faces']],
+                    'face_count': result['face_count'],
+                    'marked_count': result['marked_count']
+                })
+            else:
+                marked_count += 1 if result['attendance_marked'] else 0
+                frame_results.append({'success': True, **format_face_result(result)})
+        
+        logger.info(f"Batch recognition: {len(frames)} frames, {marked_count} marked")
+        
+        return jsonify({
+            'success': True,
+            'frames': frame_results,
+            'frame_count': len(frames),
+            'marked_count': marked_count,
+            'meta': meta
+        }), 200
+        
+    except EncodingPoolError as e:
+        logger.warning(f"Batch recognition rejected: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 503
+    except Exception as e:
+        logger.error(f"Batch recognition error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/reload', methods=['POST'])
 def reload_system():
-    """Reload the face recognition system (useful after training new faces)"""
+    """Reload the face recognition system (useful after training new faces).
+    
+    The new gallery is built while the current one keeps serving requests and
+    is swapped in only when complete. With ?async=1 the reload runs in the
+    background and the endpoint returns 202 immediately.
+    """
     try:
-        global face_recognition_system
-        face_recognition_system = None
-        
-        if initialize_system():
-            return jsonify({'success': True, 'message': 'System reloaded successfully'}), 200
-        else:
+        if face_recognition_system is None:
+            if initialize_system():
+                return jsonify({'success': True, 'message': 'System reloaded successfully'}), 200
             return jsonify({'success': False, 'error': 'Failed to reload system'}), 500
+        
+        if is_truthy(request.args.get('async')):
+            threading.Thread(target=_reload_in_background, daemon=True).start()
+            return jsonify({'success': True, 'message': 'Reload started'}), 202
+        
+        reload_gallery()
+        return jsonify({'success': True, 'message': 'System reloaded successfully'}), 200
             
     except Exception as e:
         logger.error(f"Reload error: {e}")
@@ -117,83 +453,58 @@ def reload_system():
 
 @app.route('/attendance/today', methods=['GET'])
 def get_today_attendance():
-    """Get today's attendance records - supports filtering by class and time slot"""
+    """Get today's attendance records - supports filtering by class and time slot.
+    
+    Records are served from the in-memory attendance index. Pass the returned
+    ``cursor`` back as ``?since=<cursor>`` to get only records added since.
+    """
     try:
-        if face_recognition_system is None:
-            if not initialize_system():
-                return jsonify({'success': False, 'error': 'System not initialized'}), 500
-        
-        import pandas as pd
-        from datetime import datetime
-        import glob
-        
-        today_date = datetime.now().strftime("%Y-%m-%d")
-        
-        # Get query parameters for filtering
-        department = request.args.get('department')
-        year = request.args.get('year')
-        division = request.args.get('division')
-        time_slot = request.args.get('time_slot')
-        
-        # Build file path based on new folder structure
-        if department and year and division and time_slot:
-            # Sanitize time slot
-            safe_time = time_slot.replace(" ", "").replace(":", "-").replace("--", "-")
-            filename = f"{today_date}_{safe_time}.csv"
-            # New structure: AttendanceFiles/department/year/division/date_timeslot.csv
-            attendance_file = os.path.join(face_recognition_system.ATTENDANCE_DIR, department, year, division, filename)
-            
-            if os.path.exists(attendance_file):
-                df = pd.read_csv(attendance_file, comment='#')
-                records = df.to_dict('records')
-            else:
-                records = []
-        elif department and year and division:
-            # Get all files for this class today
-            class_folder = os.path.join(face_recognition_system.ATTENDANCE_DIR, department, year, division)
-            if os.path.exists(class_folder):
-                pattern = os.path.join(class_folder, f"{today_date}_*.csv")
-                files = glob.glob(pattern)
-                records = []
-                for file in files:
-                    try:
-                        df = pd.read_csv(file, comment='#')
-                        records.extend(df.to_dict('records'))
-                    except:
-                        pass
-            else:
-                records = []
-        else:
-            # Get all attendance files for today across all classes
-            pattern = os.path.join(face_recognition_system.ATTENDANCE_DIR, "**", f"{today_date}_*.csv")
-            files = glob.glob(pattern, recursive=True)
-            
-            if not files:
-                return jsonify({'success': True, 'records': []}), 200
-            
-            # Combine all records
-            records = []
-            for file in files:
-                try:
-                    df = pd.read_csv(file, comment='#')
-                    records.extend(df.to_dict('records'))
-                except:
-                    pass
+        if not wait_until_ready():
+            return jsonify({'success': False, 'error': 'System not ready'}), 503
         
-        return jsonify({'success': True, 'records': records}), 200
+        since = request.args.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return jsonify({'success': False, 'error': "'since' must be an integer cursor"}), 400
+        
+        records, cursor = face_recognition_system.attendance_index.records(
+            department=request.args.get('department'),
+            year=request.args.get('year'),
+            division=request.args.get('division'),
+            time_slot=request.args.get('time_slot'),
+            since=since
+        )
+        return jsonify({'success': True, 'records': records, 'cursor': cursor}), 200
         
     except Exception as e:
         logger.error(f"Error fetching attendance: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 if __name__ == '__main__':
-    # Initialize the system on startup
-    if initialize_system():
-        print("[INFO] Starting Face Recognition Server on http://127.0.0.1:5001")
-        app.run(host='127.0.0.1', port=5001, debug=True)
-    else:
-        print("[ERROR] Failed to initialize face recognition system")
-        print("[INFO] Make sure you have:")
-        print("  1. encodings.pkl file (run train.py first)")
-        print("  2. students.csv file with student data")
-        exit(1)
+    import argparse
+    parser = argparse.ArgumentParser(description="Face Recognition Server")
+    parser.add_argument("--startup_report", action="store_true",
+                        help="Initialize and warm up the system, print startup timings and exit")
+    args = parser.parse_args()
+    
+    if args.startup_report:
+        if not initialize_system():
+            print("[ERROR] Failed to initialize face recognition system")
+            print("[INFO] Make sure you have:")
+            print("  1. trained encodings (run train.py first)")
+            print("  2. students.csv file with student data")
+            exit(1)
+        for step, seconds in startup_state['timings'].items():
+            print(f"[INFO] {step}: {seconds:.3f}s")
+        exit(0)
+    
+    # Load models in the background so the server accepts connections right
+    # away; /ready reports when recognition requests can be served. With
+    # debug=True the reloader parent only watches files and re-runs this script
+    # in a child (WERKZEUG_RUN_MAIN set), so only the child initializes
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_init()
+    print("[INFO] Starting Face Recognition Server on http://127.0.0.1:5001")
+    app.run(host='127.0.0.1', port=5001, debug=True, threaded=True)
@@ -0,0 +1,95 @@
+"""
+Lightweight IoU face tracker for the live webcam loop
+"""
+
+import numpy as np
+
+
+def box_iou(boxes_a, boxes_b):
+    """IoU matrix between two lists of (top, right, bottom, left) boxes"""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    top = np.maximum(a[:, None, 0], b[None, :, 0])
+    right = np.minimum(a[:, None, 1], b[None, :, 1])
+    bottom = np.minimum(a[:, None, 2], b[None, :, 2])
+    left = np.maximum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+    area_a = (a[:, 1] - a[:, 3]) * (a[:, 2] - a[:, 0])
+    area_b = (b[:, 1] - b[:, 3]) * (b[:, 2] - b[:, 0])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+class Track:
+    """A face followed across frames together with its last known identity"""
+
+    def __init__(self, track_id, box, frame_no):
+        self.track_id = track_id
+        self.box = box
+        self.last_seen = frame_no
+        self.last_encoded = None
+        self.name = "Unknown"
+        self.confidence = 0
+        self.status = None
+        self.hits = 0  # consecutive encodings that agreed on the same identity
+
+
+class FaceTracker:
+    """Associates detections across frames so faces are not re-encoded every frame.
+
+    A track is re-encoded when it is new, while its identity is still
+    unsettled (not Accepted, or Rejected as unknown, ``confirm_hits`` times in
+    a row), or once ``refresh_interval`` frames have passed since its last
+    encoding.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=10, refresh_interval=30, confirm_hits=2):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.refresh_interval = refresh_interval
+        self.confirm_hits = confirm_hits
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, boxes, frame_no):
+        """Match this frame's boxes to tracks; returns one track per box, in order"""
+        assigned = [None] * len(boxes)
+        if self.tracks and boxes:
+            iou = box_iou([t.box for t in self.tracks], boxes)
+            # Greedy association, best overlap first
+            for t_idx, b_idx in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+                if iou[t_idx, b_idx] < self.iou_threshold:
+                    break
+                track = self.tracks[t_idx]
+                if assigned[b_idx] is not None or track.last_seen == frame_no:
+                    continue
+                track.box = boxes[b_idx]
+                track.last_seen = frame_no
+                assigned[b_idx] = track
+
+        for b_idx, box in enumerate(boxes):
+            if assigned[b_idx] is None:
+                track = Track(self._next_id, box, frame_no)
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[b_idx] = track
+
+        self.tracks = [t for t in self.tracks if frame_no - t.last_seen <= self.max_missed]
+        return assigned
+
+    def needs_encoding(self, track, frame_no):
+        """Whether the track's face must be encoded and matched on this frame"""
+        if track.last_encoded is None:
+            return True
+        # Unknown faces settle too, so strangers in view are not encoded every frame
+        if track.status not in ("Accepted", "Rejected") or track.hits < self.confirm_hits:
+            return True
+        return frame_no - track.last_encoded >= self.refresh_interval
+
+    def assign(self, track, name, confidence, status, frame_no):
+        """Record a fresh match result for a track"""
+        track.hits = track.hits + 1 if name == track.name else 1
+        track.name = name
+        track.confidence = confidence
+        track.status = status
+        track.last_encoded = frame_no
@@ -1,19 +1,23 @@
 import os
+import atexit
 import base64
 import io
+import threading
 from datetime import datetime
 
 import numpy as np
 import cv2
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from sklearn.metrics.pairwise import cosine_similarity
 import tensorflow as tf
 from tensorflow.keras.models import load_model
 
 import mysql.connector as mysql
 import skfuzzy as fuzz
 
+from embedding_gallery import load_gallery
+from inference_batcher import InferenceBatcher
+
 app = Flask(__name__)
 CORS(app)
 
@@ -21,6 +25,11 @@ CORS(app)
 MODEL_PATH = os.environ.get('FR_MODEL_PATH', './models/embedding_model.h5')
 GALLERY_VECS = os.environ.get('FR_GALLERY_VECS', './models/gallery_embeddings.npy')
 GALLERY_NAMES = os.environ.get('FR_GALLERY_NAMES', './models/gallery_embeddings.npy.names.npy')
+# Faces from concurrent requests are embedded together: at most FR_INFER_MAX_BATCH
+# per model call, waiting up to FR_INFER_MAX_WAIT seconds for a batch to fill
+INFER_MAX_BATCH = int(os.environ.get('FR_INFER_MAX_BATCH', 16))
+INFER_MAX_WAIT = float(os.environ.get('FR_INFER_MAX_WAIT', 0.01))
+INFER_TIMEOUT = float(os.environ.get('FR_INFER_TIMEOUT', 30))
 
 DB_HOST = os.environ.get('DB_HOST', 'localhost')
 DB_NAME = os.environ.get('DB_NAME', 'smart_attendance')
@@ -76,32 +85,31 @@ def preprocess_face_b64(data_url: str, target_size=(96,96)):
     return roi
 
 
-def load_gallery(vec_path: str, names_path: str):
-    vecs = np.load(vec_path)
-    names = np.load(names_path, allow_pickle=True)
-    return { str(names[i]): vecs[i] for i in range(len(names)) }
-
-
 def recognize_embedding(embedding: np.ndarray, gallery):
-    names = list(gallery.keys())
-    mat = np.stack([gallery[n] for n in names], axis=0)
-    sims = cosine_similarity([embedding], mat)[0]
-    bi = int(np.argmax(sims))
-    return names[bi], float(sims[bi]), sims.tolist(), names
+    # The gallery is normalized once at load, so this is one matrix-vector product
+    name, sim, sims = gallery.best_match(embedding)
+    return name, sim, sims.tolist(), gallery.names
 
 
 # Lazy globals
 MODEL = None
+BATCHER = None
 GALLERY = None
 FUZZY = build_fuzzy_system()
+_load_lock = threading.Lock()
 
 
 def ensure_loaded():
-    global MODEL, GALLERY
-    if MODEL is None:
-        MODEL = load_model(MODEL_PATH, compile=False)
-    if GALLERY is None:
-        GALLERY = load_gallery(GALLERY_VECS, GALLERY_NAMES)
+    global MODEL, BATCHER, GALLERY
+    with _load_lock:
+        if MODEL is None:
+            MODEL = load_model(MODEL_PATH, compile=False)
+        if BATCHER is None:
+            # predict_on_batch skips predict()'s per-call setup; the batcher thread is its only caller
+            BATCHER = InferenceBatcher(MODEL.predict_on_batch, INFER_MAX_BATCH, INFER_MAX_WAIT)
+            atexit.register(BATCHER.close)
+        if GALLERY is None:
+            GALLERY = load_gallery(GALLERY_VECS, GALLERY_NAMES)
 
 
 def get_db():
@@ -137,7 +145,7 @@ def recognize():
         time_slot = meta.get('time_slot') or '9:00 - 10:00'
 
         face = preprocess_face_b64(image_data)
-        emb = MODEL.predict(np.expand_dims(face, 0))[0]
+        emb = BATCHER.predict(face, timeout=INFER_TIMEOUT)
         name, sim, sims, names = recognize_embedding(emb, GALLERY)
         decision, score = fuzzy_decide_attendance(sim, FUZZY)
 
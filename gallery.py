@@ -0,0 +1,260 @@
+"""
+Vectorized gallery matching for the face recognition system
+"""
+
+import numpy as np
+import pandas as pd
+
+from ann_index import IVFIndex
+from encodings_store import class_sort_key
+
+
+def distances_to_confidence(distances):
+    """Convert Euclidean distances to the percentage confidence used for attendance"""
+    return np.round((1 - np.asarray(distances, dtype=np.float64)) * 100, 2)
+
+
+class GalleryMatcher:
+    """Baseline encodings packed into one contiguous float32 matrix.
+
+    Rows of ``matrix`` line up with ``names`` and ``roll_nos``, so every query
+    is answered with a single NumPy call instead of a per-student Python loop.
+    Rows are grouped by class, and ``class_index`` maps
+    department -> year -> division -> row slice, so a class-filtered query
+    runs on a view of the matrix without copying or rescanning it.
+
+    ``matrix`` may hold the rows of ``baseline_encodings`` in its key order
+    (e.g. a memory-mapped array from the encodings store); when that order is
+    already grouped by class it is used without copying.
+
+    A student can have several prototypes (representative encodings from
+    training): ``prototypes`` holds them as contiguous rows, in the key order
+    of ``baseline_encodings``, with ``prototype_counts`` rows per student. A
+    probe is then scored against each student's closest prototype. Without
+    prototypes the baseline is the only one.
+
+    With an ``ann`` config (AnnConfig) and at least ``ann.min_size`` students,
+    an IVF index over the prototypes answers whole-gallery best_matches and
+    top_k queries approximately; class-filtered queries and smaller galleries
+    are always exact.
+    """
+
+    def __init__(self, baseline_encodings, roll_nos=None, class_info=None, matrix=None,
+                 prototypes=None, prototype_counts=None, ann=None):
+        roll_nos = roll_nos or {}
+        class_info = class_info or {}
+        self.has_class_info = bool(class_info)
+
+        # Stable sort by class so each class occupies one contiguous block of rows
+        def class_key(name):
+            return class_sort_key(class_info.get(name))
+
+        names = sorted(baseline_encodings.keys(), key=class_key)
+        self.names = np.array(names, dtype=object)
+        self.roll_nos = np.array([str(roll_nos.get(name, "")) for name in names], dtype=object)
+
+        if matrix is not None and names == list(baseline_encodings):
+            self.matrix = np.asarray(matrix, dtype=np.float32)
+        elif names:
+            self.matrix = np.ascontiguousarray(
+                np.stack([baseline_encodings[name] for name in names]), dtype=np.float32
+            )
+        else:
+            self.matrix = np.empty((0, 128), dtype=np.float32)
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+        # prototype_offsets[i]:prototype_offsets[i + 1] are the prototype rows of student row i
+        if prototypes is None:
+            self.prototypes = self.matrix
+            self.prototype_offsets = np.arange(len(names) + 1)
+        else:
+            counts = np.asarray(prototype_counts, dtype=np.intp)
+            starts = np.concatenate([[0], np.cumsum(counts)])
+            if names == list(baseline_encodings):
+                self.prototypes = np.asarray(prototypes, dtype=np.float32)
+                self.prototype_offsets = starts
+            else:
+                position = {name: i for i, name in enumerate(baseline_encodings)}
+                order = [position[name] for name in names]
+                self.prototypes = np.ascontiguousarray(
+                    np.concatenate([prototypes[starts[i]:starts[i + 1]] for i in order]), dtype=np.float32
+                )
+                self.prototype_offsets = np.concatenate([[0], np.cumsum(counts[order])])
+        self.prototype_sq_norms = np.einsum("ij,ij->i", self.prototypes, self.prototypes)
+
+        self.index = None
+        if ann is not None and len(names) >= max(1, ann.min_size):
+            owners = np.repeat(np.arange(len(names)), np.diff(self.prototype_offsets))
+            self.index = IVFIndex(self.prototypes, owners, ann.nlist, ann.nprobe)
+
+        self.class_index = {}
+        start = 0
+        for row in range(1, len(names) + 1):
+            if row < len(names) and class_key(names[row]) == class_key(names[start]):
+                continue
+            unclassified, department, year, division = class_key(names[start])
+            if not unclassified:
+                years = self.class_index.setdefault(department, {})
+                years.setdefault(year, {})[division] = slice(start, row)
+            start = row
+
+    def __len__(self):
+        return len(self.names)
+
+    def class_rows(self, department, year, division):
+        """Row slice for one class, or None to search the whole gallery.
+
+        Mirrors the old filter: without any class information every student is
+        a candidate, while an unknown class yields an empty slice.
+        """
+        if not self.has_class_info:
+            return None
+        return self.class_index.get(department, {}).get(year, {}).get(division, slice(0, 0))
+
+    def _subset(self, rows):
+        if rows is None:
+            return self.matrix, self.sq_norms, self.names, self.roll_nos
+        return self.matrix[rows], self.sq_norms[rows], self.names[rows], self.roll_nos[rows]
+
+    def _prototype_subset(self, rows):
+        """Prototype rows, squared norms and per-student start offsets for a row slice"""
+        if rows is None:
+            return self.prototypes, self.prototype_sq_norms, self.prototype_offsets[:-1]
+        start, stop = self.prototype_offsets[rows.start], self.prototype_offsets[rows.stop]
+        offsets = self.prototype_offsets[rows.start:rows.stop] - start
+        return self.prototypes[start:stop], self.prototype_sq_norms[start:stop], offsets
+
+    def distances(self, probes, rows=None):
+        """Distances from one (128,) or many (n, 128) probes to every gallery row.
+
+        A student's distance is the one to their closest prototype.
+        """
+        matrix, sq_norms, offsets = self._prototype_subset(rows)
+        probes = np.asarray(probes, dtype=np.float32)
+        if probes.ndim == 1:
+            distances = np.linalg.norm(matrix - probes, axis=1)
+        else:
+            # |a - b|^2 = |a|^2 + |b|^2 - 2ab keeps the batch as one matrix product
+            sq = np.einsum("ij,ij->i", probes, probes)[:, None] + sq_norms[None, :]
+            sq -= 2.0 * (probes @ matrix.T)
+            distances = np.sqrt(np.maximum(sq, 0.0))
+
+        if len(offsets) == len(matrix):
+            # One prototype per student
+            return distances
+        return np.minimum.reduceat(distances, offsets, axis=-1)
+
+    def _exact_confidence(self, probe, row, rows=None):
+        """Confidence of one probe against one student, from direct differences.
+
+        The batched |a|^2 + |b|^2 - 2ab distances lose precision in float32, so
+        the reported confidence of a match is recomputed the way a single probe
+        is scored.
+        """
+        if rows is not None:
+            row += rows.start
+        start, stop = self.prototype_offsets[row], self.prototype_offsets[row + 1]
+        distance = np.linalg.norm(self.prototypes[start:stop] - probe, axis=1).min()
+        return float(distances_to_confidence(distance))
+
+    def confidences(self, probes, rows=None):
+        """Confidence of one or many probes against every gallery row"""
+        return distances_to_confidence(self.distances(probes, rows))
+
+    def best_match(self, probe, rows=None):
+        """Return (name, confidence) of the closest student, or ("Unknown", 0)"""
+        return self.best_matches(np.asarray(probe)[None, :], rows)[0]
+
+    def best_matches(self, probes, rows=None):
+        """Return one (name, confidence) pair per probe"""
+        probes = np.asarray(probes, dtype=np.float32)
+        names = self._subset(rows)[2]
+        if len(names) == 0 or len(probes) == 0:
+            return [("Unknown", 0) for _ in range(len(probes))]
+
+        if rows is None and self.index is not None:
+            results = []
+            for probe, (owners, _) in zip(probes, self.index.search(probes, k=1)):
+                confidence = self._exact_confidence(probe, owners[0]) if len(owners) else 0
+                if confidence > 0:
+                    results.append((str(names[owners[0]]), confidence))
+                else:
+                    results.append(("Unknown", 0))
+            return results
+
+        if len(probes) == 1:
+            conf = self.confidences(probes[0], rows)[None, :]
+        else:
+            conf = self.confidences(probes, rows)
+        best = np.argmax(conf, axis=1)
+        results = []
+        for i, row in enumerate(best):
+            confidence = self._exact_confidence(probes[i], row, rows) if len(probes) > 1 else float(conf[i, row])
+            # Matches the old loop, which only replaced "Unknown" on a positive score
+            if confidence > 0:
+                results.append((str(names[row]), confidence))
+            else:
+                results.append(("Unknown", 0))
+        return results
+
+    def top_k(self, probe, k=5, rows=None):
+        """Return the k closest students as (name, roll_no, confidence), best first"""
+        _, _, names, roll_nos = self._subset(rows)
+        if len(names) == 0:
+            return []
+        if rows is None and self.index is not None:
+            probe = np.asarray(probe, dtype=np.float32)
+            owners, _ = self.index.search(probe, k=k)[0]
+            return [(str(names[r]), str(roll_nos[r]), self._exact_confidence(probe, r)) for r in owners]
+        conf = self.confidences(np.asarray(probe, dtype=np.float32), rows)
+        k = min(k, len(conf))
+        best = np.argpartition(-conf, k - 1)[:k]
+        best = best[np.argsort(-conf[best], kind="stable")]
+        return [(str(names[r]), str(roll_nos[r]), float(conf[r])) for r in best]
+
+
+class StudentDirectory:
+    """Student records from students.csv with O(1) name and roll number lookups"""
+
+    def __init__(self, students_csv):
+        self.students_df = pd.read_csv(students_csv)
+        self.students_df["Name"] = self.students_df["Name"].str.strip()
+        self.students_df["RollNo"] = self.students_df["RollNo"].astype(str).str.strip()
+
+        # Resolve names and roll numbers with dictionary lookups instead of
+        # scanning the DataFrame per match; the first row wins on duplicates
+        # as it did with the old filter. students_df is kept for callers
+        # such as the /health endpoint.
+        self.roll_by_name = {}
+        self.student_by_roll = {}
+        for record in self.students_df.to_dict("records"):
+            if isinstance(record["Name"], str):
+                self.roll_by_name.setdefault(record["Name"].lower(), record["RollNo"])
+            self.student_by_roll.setdefault(record["RollNo"], record)
+
+
+class Gallery:
+    """Snapshot of everything recognition reads: encodings, students and matcher.
+
+    A snapshot is never modified after it is built. Reloading builds a new one
+    and swaps it in with a single assignment, so requests in flight finish on
+    the snapshot they started with.
+    """
+
+    def __init__(self, known_encodings, known_names, baseline_encodings, student_class_info,
+                 students, encodings_mtime=None, students_mtime=None, baseline_matrix=None,
+                 prototype_matrix=None, prototype_counts=None, ann=None):
+        self.known_encodings = known_encodings
+        self.known_names = known_names
+        self.baseline_encodings = baseline_encodings
+        self.student_class_info = student_class_info
+        self.students = students
+        self.encodings_mtime = encodings_mtime
+        self.students_mtime = students_mtime
+
+        # Pack baseline encodings once so matching is a single NumPy call;
+        # the matcher also indexes rows by department/year/division and, for
+        # large galleries with ann set, builds the approximate index
+        roll_nos = {name: students.roll_by_name.get(name.lower(), '') for name in baseline_encodings}
+        self.matcher = GalleryMatcher(baseline_encodings, roll_nos, student_class_info, baseline_matrix,
+                                      prototype_matrix, prototype_counts, ann)
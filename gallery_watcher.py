@@ -0,0 +1,58 @@
+"""
+Background watcher that reloads the gallery when its source files change
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class GalleryWatcher(threading.Thread):
+    """Polls file modification times and calls on_change once they settle.
+
+    A change is only acted on after the files have stayed the same for one
+    full polling interval, so a reload does not start while train.py is still
+    writing encodings.
+    """
+
+    def __init__(self, paths, on_change, interval=5.0):
+        super().__init__(name="GalleryWatcher", daemon=True)
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def _snapshot(self):
+        state = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                state.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                state.append(None)
+        return tuple(state)
+
+    def run(self):
+        last = self._snapshot()
+        pending = None
+        while not self._stop_event.wait(self.interval):
+            current = self._snapshot()
+            if current == last:
+                pending = None
+            elif current != pending:
+                # Changed since the last poll; wait one more interval to settle
+                pending = current
+            else:
+                logger.info(f"Detected changes in {', '.join(os.path.basename(p) for p in self.paths)}")
+                try:
+                    self.on_change()
+                    last = current
+                except Exception as e:
+                    # Keep watching; the old gallery stays in service
+                    logger.error(f"Automatic reload failed: {e}")
+                pending = None
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,95 @@
+"""
+Micro-batching of model inference across concurrent requests
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class InferenceBatcher:
+    """Collects inputs from concurrent requests and runs them through the model together.
+
+    A background thread takes up to ``max_batch`` queued inputs, waiting at
+    most ``max_wait`` seconds after the first one arrives for others to join,
+    stacks them into one array and makes a single ``predict_batch`` call. Each
+    caller gets its own row of the result. The thread is also the only one
+    that calls the model, so the model never runs concurrently.
+    """
+
+    def __init__(self, predict_batch, max_batch=16, max_wait=0.01):
+        self.predict_batch = predict_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+
+        self._pending = []  # (input, future)
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="InferenceBatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """Queue one input; returns a Future of its model output"""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Inference batcher is closed")
+            self._pending.append((item, future))
+            if len(self._pending) == 1:
+                # Start the max_wait clock
+                self._oldest = time.monotonic()
+                self._cond.notify()
+            elif len(self._pending) >= self.max_batch:
+                self._cond.notify()
+        return future
+
+    def predict(self, item, timeout=None):
+        """Model output for one input, computed as part of a batch"""
+        return self.submit(item).result(timeout)
+
+    def close(self):
+        """Stop the background thread after running everything queued"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending or not self._closed:
+                    if len(self._pending) >= self.max_batch or (self._closed and self._pending):
+                        break
+                    if self._pending:
+                        remaining = self._oldest + self.max_wait - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                # Inputs left over wait from now on
+                self._oldest = time.monotonic() if self._pending else None
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        futures = [future for _, future in batch]
+        try:
+            outputs = np.asarray(self.predict_batch(np.stack([item for item, _ in batch])))
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.items += len(batch)
+        for future, output in zip(futures, outputs):
+            future.set_result(output)
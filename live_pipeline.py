@@ -0,0 +1,173 @@
+"""
+Pipelined capture / recognize / display loop for the live webcam mode
+"""
+
+import queue
+import threading
+
+import cv2
+
+from detection import detect_faces, encode_faces
+
+
+class StageQueue(queue.Queue):
+    """Queue that remembers its peak depth and drops the oldest item when full"""
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.peak_depth = 0
+        self.dropped = 0
+
+    def put_latest(self, item):
+        while True:
+            try:
+                self.put_nowait(item)
+                break
+            except queue.Full:
+                try:
+                    self.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        self.peak_depth = max(self.peak_depth, self.qsize())
+
+
+class LivePipeline:
+    """Runs capture, recognition and display as separate stages.
+
+    A capture thread keeps only the newest frames (stale ones are dropped), a
+    pool of worker threads runs detection and encoding (dlib releases the GIL
+    there), and the display stage in the calling thread draws the most recent
+    results on the newest frame. Matching, attendance marking and tracker
+    updates are serialized behind one lock because they share system state.
+    """
+
+    def __init__(self, system, camera=0, workers=2, tracker=None):
+        self.system = system
+        self.camera = camera
+        self.workers = max(1, workers)
+        self.tracker = tracker
+
+        self.frames = StageQueue(maxsize=self.workers)
+        self.results = StageQueue(maxsize=self.workers * 2)
+        self._stop = threading.Event()
+        self._state_lock = threading.Lock()
+        self._latest_frame = None
+        self._last_tracked = 0
+
+        self.captured = 0
+        self.processed = 0
+        self.displayed = 0
+        self.encoded_faces = 0
+
+    def _capture_loop(self, cap):
+        while not self._stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                self._stop.set()
+                break
+            self.captured += 1
+            self._latest_frame = (self.captured, frame)
+            self.frames.put_latest((self.captured, frame))
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            try:
+                seq, frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            face_locations = detect_faces(rgb_frame, self.system.detection)
+
+            with self._state_lock:
+                if self.tracker is None:
+                    tracks = [None] * len(face_locations)
+                    to_encode = list(range(len(face_locations)))
+                elif seq < self._last_tracked:
+                    # A newer frame already updated the tracker; this one is stale
+                    continue
+                else:
+                    self._last_tracked = seq
+                    tracks = self.tracker.update(face_locations, seq)
+                    to_encode = [i for i, track in enumerate(tracks) if self.tracker.needs_encoding(track, seq)]
+
+            face_encodings = encode_faces(rgb_frame, [face_locations[i] for i in to_encode])
+
+            labels = {}
+            with self._state_lock:
+                self.processed += 1
+                self.encoded_faces += len(face_encodings)
+                if face_encodings:
+                    matches = self.system.matcher.best_matches(face_encodings)
+                    for i, (best_name, best_confidence) in zip(to_encode, matches):
+                        result = self.system.process_match(best_name, best_confidence)
+                        labels[i] = (result["name"], best_confidence)
+                        if self.tracker is not None:
+                            self.tracker.assign(tracks[i], result["name"], best_confidence, result["status"], seq)
+
+            faces = []
+            for i, face_loc in enumerate(face_locations):
+                if i in labels:
+                    faces.append((face_loc,) + labels[i])
+                else:
+                    faces.append((face_loc, tracks[i].name, tracks[i].confidence))
+            self.results.put_latest((seq, faces))
+
+    def run(self, window="Face Recognition Attendance"):
+        """Run until 'q' is pressed or the camera stops; returns the stage statistics"""
+        cap = cv2.VideoCapture(self.camera)
+        threads = [threading.Thread(target=self._capture_loop, args=(cap,), daemon=True)]
+        threads += [threading.Thread(target=self._worker_loop, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        result_seq, faces = 0, []
+        try:
+            while not self._stop.is_set():
+                # Keep only the newest finished result
+                while True:
+                    try:
+                        seq, latest_faces = self.results.get_nowait()
+                    except queue.Empty:
+                        break
+                    if seq > result_seq:
+                        result_seq, faces = seq, latest_faces
+
+                latest = self._latest_frame
+                if latest is None:
+                    if cv2.waitKey(10) & 0xFF == ord('q'):
+                        break
+                    continue
+
+                frame = latest[1].copy()
+                for (top, right, bottom, left), best_name, best_confidence in faces:
+                    cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
+                    cv2.putText(frame, f"{best_name} ({best_confidence}%)", (left, top - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                cv2.imshow(window, frame)
+                self.displayed += 1
+
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join(timeout=2)
+            cap.release()
+            cv2.destroyAllWindows()
+
+        return self.stats()
+
+    def stats(self):
+        """Frame counters and per-stage queue depths"""
+        return {
+            "captured": self.captured,
+            "processed": self.processed,
+            "displayed": self.displayed,
+            "encoded_faces": self.encoded_faces,
+            "frame_queue_peak": self.frames.peak_depth,
+            "frame_queue_dropped": self.frames.dropped,
+            "result_queue_peak": self.results.peak_depth,
+            "result_queue_dropped": self.results.dropped,
+        }
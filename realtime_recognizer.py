@@ -8,11 +8,12 @@ from typing import Dict
 
 import tensorflow as tf
 from tensorflow.keras.models import load_model
-from sklearn.metrics.pairwise import cosine_similarity
 
 # Reuse fuzzy logic from the training script (inlined here for convenience)
 import skfuzzy as fuzz
 
+from embedding_gallery import EmbeddingGallery, load_gallery
+
 
 def build_fuzzy_system():
     x_sim = np.linspace(-1.0, 1.0, 201)
@@ -53,18 +54,9 @@ def preprocess_face(frame_bgr, target_size=(96,96)):
     return roi
 
 
-def load_gallery(gallery_vec_path: str, names_path: str):
-    vecs = np.load(gallery_vec_path)
-    names = np.load(names_path, allow_pickle=True)
-    return { str(names[i]): vecs[i] for i in range(len(names)) }
-
-
-def recognize_embedding(embedding: np.ndarray, gallery: Dict[str, np.ndarray]):
-    names = list(gallery.keys())
-    mat = np.stack([gallery[n] for n in names], axis=0)
-    sims = cosine_similarity([embedding], mat)[0]
-    bi = int(np.argmax(sims))
-    return names[bi], float(sims[bi])
+def recognize_embedding(embedding: np.ndarray, gallery: EmbeddingGallery):
+    name, sim, _ = gallery.best_match(embedding)
+    return name, sim
 
 
 def insert_attendance(db, student_id: int, teacher_id: int, department: str, year: str, division: str, time_slot: str):
@@ -1,19 +1,30 @@
 import cv2
-import face_recognition
-import pickle
 import pandas as pd
 from datetime import datetime
 import os
 import numpy as np
 import base64
+import threading
+from gallery import Gallery, StudentDirectory
+from ann_index import AnnConfig
+from encodings_store import load_encodings, meta_path
+from attendance_index import AttendanceIndex, safe_time_slot
+from attendance_sessions import AttendanceSession, AttendanceSessionCache
+from attendance_writer import AttendanceWriter
+from detection import DetectionConfig, DETECTION_MODELS, detect_faces, encode_faces, detect_and_encode, warm_up
+from face_tracker import FaceTracker
+from encoding_pool import EncodingPoolError
 
 class FaceRecognitionSystem:
-    def __init__(self):
+    def __init__(self, session_idle_timeout=3600, detection=None, attendance_writer=None, ann=None,
+                 attendance_refresh_interval=0):
         # ----------------------------
         # Paths
         # ----------------------------
         self.BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        self.ENCODINGS_PATH = os.path.join(self.BASE_DIR, "encodings.pkl")
+        self.ENCODINGS_DIR = os.path.join(self.BASE_DIR, "encodings")
+        self.ENCODINGS_META = meta_path(self.ENCODINGS_DIR)
+        self.LEGACY_ENCODINGS_PATH = os.path.join(self.BASE_DIR, "encodings.pkl")
         self.STUDENTS_CSV = os.path.join(self.BASE_DIR, "students.csv")
         self.ATTENDANCE_DIR = os.path.join(self.BASE_DIR, "AttendanceFiles")
         
@@ -21,38 +32,121 @@ class FaceRecognitionSystem:
         if not os.path.exists(self.ATTENDANCE_DIR):
             os.makedirs(self.ATTENDANCE_DIR)
         
+        # Face detection settings (resolution, detector model, upsampling)
+        self.detection = detection or DetectionConfig()
+        
+        # Optional AnnConfig: approximate whole-gallery search for large galleries
+        self.ann = ann
+        
+        # Optional EncodingPool that runs detection + encoding in worker processes
+        self.encoding_pool = None
+        
+        # Open attendance sessions, evicted after session_idle_timeout seconds unused
+        self.attendance_sessions = AttendanceSessionCache(idle_timeout=session_idle_timeout)
+        
+        # Attendance rows are queued and appended to their files in batches
+        self.attendance_writer = attendance_writer or AttendanceWriter()
+        
+        # Today's attendance records in memory, updated by the sessions on every write
+        # (and from disk every attendance_refresh_interval seconds when set, for multi-process servers)
+        self.attendance_index = AttendanceIndex(self.ATTENDANCE_DIR, attendance_refresh_interval)
+        self.attendance_index.load_today()
+        
         # Load encodings and students data
+        self._reload_lock = threading.Lock()
         self.load_data()
         
         # Prepare today's attendance file
         self.setup_attendance_file()
     
     def load_data(self):
-        """Load face encodings and student data"""
+        """Load face encodings and student data into a new gallery and swap it in"""
         try:
-            with open(self.ENCODINGS_PATH, "rb") as f:
-                data = pickle.load(f)
-                # Handle both old and new format
-                if len(data) == 4:
-                    self.known_encodings, self.known_names, self.baseline_encodings, self.student_class_info = data
-                else:
-                    self.known_encodings, self.known_names, self.baseline_encodings = data
-                    self.student_class_info = {}
+            # Matrices are memory-mapped; a legacy encodings.pkl must be converted first
+            data = load_encodings(self.ENCODINGS_DIR, self.LEGACY_ENCODINGS_PATH)
+            encodings_mtime = os.path.getmtime(data.source)
+            students_mtime = os.path.getmtime(self.STUDENTS_CSV)
+            known_names = data.known_names
+            student_class_info = data.student_class_info
+            
+            # Reuse the parsed student list when students.csv has not changed
+            previous = getattr(self, "gallery", None)
+            if previous is not None and previous.students_mtime == students_mtime:
+                students = previous.students
+            else:
+                students = StudentDirectory(self.STUDENTS_CSV)
             
-            self.students_df = pd.read_csv(self.STUDENTS_CSV)
-            self.students_df["Name"] = self.students_df["Name"].str.strip()
-            self.students_df["RollNo"] = self.students_df["RollNo"].astype(str).str.strip()
+            gallery = Gallery(data.known_encodings, known_names, data.baseline_encodings, student_class_info,
+                              students, encodings_mtime, students_mtime, data.baseline_matrix,
+                              data.prototype_matrix, data.prototype_counts, self.ann)
+            if gallery.matcher.index is not None:
+                index = gallery.matcher.index
+                print(f"[INFO] Approximate search over {len(index)} prototypes "
+                      f"({index.nlist} lists, nprobe {index.nprobe})")
+            if not student_class_info:
+                print("[WARNING] No class information available. Class filters will use all encodings.")
             
-            print(f"[INFO] Loaded {len(self.known_names)} face encodings")
-            print(f"[INFO] Loaded {len(self.students_df)} student records")
+            # Atomic swap: requests read self.gallery once and keep their snapshot
+            self.gallery = gallery
+            
+            print(f"[INFO] Loaded {len(known_names)} face encodings")
+            print(f"[INFO] Loaded {len(students.students_df)} student records")
+            return gallery
         except Exception as e:
             print(f"[ERROR] Failed to load data: {e}")
             raise
     
+    def reload_data(self):
+        """Rebuild the gallery from disk while the current one keeps serving"""
+        with self._reload_lock:
+            return self.load_data()
+    
+    # Read-only views of the current gallery snapshot
+    known_encodings = property(lambda self: self.gallery.known_encodings)
+    known_names = property(lambda self: self.gallery.known_names)
+    baseline_encodings = property(lambda self: self.gallery.baseline_encodings)
+    student_class_info = property(lambda self: self.gallery.student_class_info)
+    matcher = property(lambda self: self.gallery.matcher)
+    students_df = property(lambda self: self.gallery.students.students_df)
+    roll_by_name = property(lambda self: self.gallery.students.roll_by_name)
+    student_by_roll = property(lambda self: self.gallery.students.student_by_roll)
+    
     def setup_attendance_file(self, department=None, year=None, division=None, time_slot=None):
         """Setup attendance file based on class and time slot"""
+        session = self.get_attendance_session(department, year, division, time_slot)
+        
+        # Current session of the live camera loop
+        self.attendance_session = session
+        self.attendance_file = session.attendance_file
+        self.current_class = session.current_class
+        self.marked_students = session.marked_students
+        return session
+    
+    def close(self):
+        """Write all queued attendance rows to disk; call before exiting"""
+        self.attendance_writer.close()
+    
+    def warm_up(self):
+        """Load the detector and encoder models with a dummy frame (and warm pool workers)"""
+        warm_up(self.detection)
+        if self.encoding_pool is not None:
+            self.encoding_pool.warm_up()
+    
+    def get_attendance_session(self, department=None, year=None, division=None, time_slot=None):
+        """Return the attendance session for a class and time slot without changing shared state"""
         today_date = datetime.now().strftime("%Y-%m-%d")
+        if not (department and year and division and time_slot):
+            department = year = division = time_slot = None
         
+        # Sessions are cached per day and class, so disk is only touched the
+        # first time a session is used (or again after it was evicted)
+        key = (today_date, department, year, division, time_slot)
+        return self.attendance_sessions.get(
+            key, lambda: self._open_attendance_session(today_date, department, year, division, time_slot)
+        )
+    
+    def _open_attendance_session(self, today_date, department, year, division, time_slot):
+        """Create the attendance file for a session and load already marked students"""
         # If class info provided, create structured folder and filename
         if department and year and division and time_slot:
             # Create full folder hierarchy: department/year/division
@@ -62,12 +156,12 @@ class FaceRecognitionSystem:
                 print(f"[INFO] Created class folder: {class_folder}")
             
             # Sanitize time slot for filename (replace spaces and colons with dashes)
-            safe_time = time_slot.replace(" ", "").replace(":", "-").replace("--", "-")
+            safe_time = safe_time_slot(time_slot)
             filename = f"{today_date}_{safe_time}.csv"
-            self.attendance_file = os.path.join(class_folder, filename)
+            attendance_file = os.path.join(class_folder, filename)
             
             # Store class metadata for reference
-            self.current_class = {
+            current_class = {
                 'department': department,
                 'year': year,
                 'division': division,
@@ -76,44 +170,40 @@ class FaceRecognitionSystem:
         else:
             # Fallback to old format
             filename = f"attendance_{today_date}.csv"
-            self.attendance_file = os.path.join(self.ATTENDANCE_DIR, filename)
-            self.current_class = None
+            attendance_file = os.path.join(self.ATTENDANCE_DIR, filename)
+            current_class = None
         
-        if not os.path.exists(self.attendance_file):
-            with open(self.attendance_file, "w", newline="") as f:
+        if not os.path.exists(attendance_file):
+            with open(attendance_file, "w", newline="") as f:
                 # Add class info in the header for reference
-                if self.current_class:
+                if current_class:
                     f.write(f"# Department: {department}, Year: {year}, Division: {division}, Time Slot: {time_slot}\n")
                 f.write("RollNo,Name,Time,Confidence,Status\n")
         
-        print(f"[INFO] Attendance file: {self.attendance_file}")
+        print(f"[INFO] Attendance file: {attendance_file}")
         
         # Load already marked students from this specific file
         try:
-            existing_df = pd.read_csv(self.attendance_file, comment='#')
-            self.marked_students = set(existing_df["RollNo"].astype(str).str.strip())
-            print(f"[INFO] Already marked: {len(self.marked_students)} students")
+            existing_df = pd.read_csv(attendance_file, comment='#')
+            marked_students = set(existing_df["RollNo"].astype(str).str.strip())
+            print(f"[INFO] Already marked: {len(marked_students)} students")
         except:
-            self.marked_students = set()
+            marked_students = set()
+        
+        return AttendanceSession(attendance_file, current_class, marked_students,
+                                 on_record=self.attendance_index.add,
+                                 writer=self.attendance_writer)
     
     def filter_encodings_by_class(self, department, year, division):
         """Filter baseline encodings to only include students from the selected class"""
-        if not self.student_class_info:
+        gallery = self.gallery
+        if not gallery.student_class_info:
             print("[WARNING] No class information available. Using all encodings.")
-            return self.baseline_encodings
-        
-        filtered_encodings = {}
-        for student_name, encoding in self.baseline_encodings.items():
-            if student_name in self.student_class_info:
-                info = self.student_class_info[student_name]
-                # Match department, year, and division
-                if (info['department'] == department and 
-                    info['year'] == year and 
-                    info['division'] == division):
-                    filtered_encodings[student_name] = encoding
+            return gallery.baseline_encodings
         
-        print(f"[INFO] Filtered to {len(filtered_encodings)} students from {department} {year} {division}")
-        return filtered_encodings
+        # Look the class up in the prebuilt index instead of scanning every student
+        rows = gallery.matcher.class_rows(department, year, division)
+        return {name: gallery.baseline_encodings[name] for name in gallery.matcher.names[rows]}
     
     def decode_base64_image(self, image_data):
         """Decode base64 image data to OpenCV format"""
@@ -122,171 +212,268 @@ class FaceRecognitionSystem:
                 image_data = image_data.split(',')[1]
             
             img_bytes = base64.b64decode(image_data)
-            nparr = np.frombuffer(img_bytes, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            return frame
+            return self.decode_image_bytes(img_bytes)
+        except Exception as e:
+            print(f"[ERROR] Failed to decode image: {e}")
+            return None
+    
+    def decode_image_bytes(self, buffer):
+        """Decode encoded image bytes (JPEG/PNG) to OpenCV format without copying the buffer"""
+        try:
+            nparr = np.frombuffer(buffer, np.uint8)
+            return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         except Exception as e:
             print(f"[ERROR] Failed to decode image: {e}")
             return None
     
-    def recognize_face_from_image(self, image_data, department=None, year=None, division=None, time_slot=None):
+    def process_match(self, best_name, best_confidence, session=None, gallery=None):
+        """Apply confidence thresholds to a match and mark attendance if accepted.
+        
+        Attendance goes to the given session, or to the live camera loop's
+        current session when none is given. The roll number is resolved in the
+        gallery snapshot the match came from.
+        """
+        session = session or self.attendance_session
+        gallery = gallery or self.gallery
+        # Apply fuzzy logic thresholds (≥ 60 accepted)
+        if best_confidence >= 60:
+            status = "Accepted"
+            decision = "present"
+        elif 40 <= best_confidence < 60:
+            status = "Uncertain"
+            decision = "uncertain"
+        else:
+            status = "Rejected"
+            decision = "absent"
+            best_name = "Unknown"
+        
+        roll_no = ""
+        attendance_marked = False
+        session.record_recognition()
+        
+        if best_name != "Unknown":
+            roll_no = gallery.students.roll_by_name.get(best_name.lower(), "")
+            if roll_no:
+                if status == "Accepted" and not session.is_marked(roll_no):
+                    time_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    try:
+                        # mark() re-checks under the session lock, so concurrent
+                        # requests cannot mark the same student twice; the row is
+                        # written to the file by the attendance writer
+                        attendance_marked = session.mark(
+                            roll_no, f"{roll_no},{best_name},{time_now},{best_confidence}%,{status}\n"
+                        )
+                    except Exception as e:
+                        print(f"[ERROR] Could not write to file: {e}")
+                    
+                    if attendance_marked:
+                        print(f"[MARKED] {roll_no} - {best_name} ({best_confidence}% - {status})")
+        
+        return {
+            "name": best_name,
+            "roll_no": roll_no,
+            "confidence": best_confidence,
+            "status": status,
+            "decision": decision,
+            "attendance_marked": attendance_marked,
+            "already_marked": session.is_marked(roll_no) if roll_no else False
+        }
+    
+    def recognize_face_from_image(self, image_data, department=None, year=None, division=None, time_slot=None, group=False):
         """Recognize face from base64 image data with optional class filtering"""
-        # Setup attendance file for this specific class and time slot
-        if department and year and division and time_slot:
-            self.setup_attendance_file(department, year, division, time_slot)
         frame = self.decode_base64_image(image_data)
-        if frame is None:
-            return {"success": False, "error": "Invalid image data"}
+        return self.recognize_face_from_frame(frame, department, year, division, time_slot, group)
+    
+    def recognize_face_from_frame(self, frame, department=None, year=None, division=None, time_slot=None, group=False):
+        """Recognize face from a decoded BGR frame with optional class filtering.
         
+        With group=True every face in the frame is matched and marked, and the
+        result holds a list of per-face results with bounding boxes.
+        """
         try:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            face_locations = face_recognition.face_locations(rgb_frame)
-            face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+            return self.recognize_faces_from_frames([frame], department, year, division, time_slot, group)[0]
+        except EncodingPoolError:
+            # Overload is reported by the server, not as a recognition failure
+            raise
+        except Exception as e:
+            print(f"[ERROR] Recognition failed: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def recognize_faces_from_frames(self, frames, department=None, year=None, division=None, time_slot=None, group=False):
+        """Recognize faces in several frames that share one class and time slot.
+        
+        Faces from all frames are matched with one batched gallery query and
+        each student is marked at most once. Returns one result per frame,
+        shaped like a recognize_face_from_frame() result.
+        """
+        # Attendance session for this specific class and time slot; kept local
+        # so concurrent requests for other classes never share it
+        session = self.get_attendance_session(department, year, division, time_slot)
+        
+        # Detect and encode all frames first, in worker processes when a pool is set
+        rgb_frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if frame is not None else None for frame in frames]
+        if self.encoding_pool is not None:
+            futures = [self.encoding_pool.submit(rgb) if rgb is not None else None for rgb in rgb_frames]
+            detections = [self.encoding_pool.result(f) if f is not None else None for f in futures]
+        else:
+            detections = [detect_and_encode(rgb, self.detection) if rgb is not None else None for rgb in rgb_frames]
+        
+        results = []
+        probes = []  # (frame index, face box, encoding)
+        for i, detected in enumerate(detections):
+            if detected is None:
+                results.append({"success": False, "error": "Invalid image data"})
+                continue
             
+            face_locations, face_encodings = detected
             if not face_encodings:
-                return {"success": False, "error": "No face detected"}
+                results.append({"success": False, "error": "No face detected"})
+                continue
             
-            face_encoding = face_encodings[0]
-            best_confidence = 0
-            best_name = "Unknown"
-            wrong_class_detected = False
-            wrong_class_info = ""
-            
-            # Filter encodings by class if specified
-            if department and year and division:
-                encodings_to_check = self.filter_encodings_by_class(department, year, division)
-            else:
-                encodings_to_check = self.baseline_encodings
-            
-            # Compare to filtered baseline encodings
-            for student_name, baseline_enc in encodings_to_check.items():
-                dist = np.linalg.norm(face_encoding - baseline_enc)
-                confidence = round((1 - dist) * 100, 2)
-                if confidence > best_confidence:
-                    best_confidence = confidence
-                    best_name = student_name
-            
-            # Apply fuzzy logic thresholds (≥ 60 accepted)
-            if best_confidence >= 60:
-                status = "Accepted"
-                decision = "present"
-            elif 40 <= best_confidence < 60:
-                status = "Uncertain"
-                decision = "uncertain"
+            # Outside group mode only the first face of each frame is used
+            if not group:
+                face_locations, face_encodings = face_locations[:1], face_encodings[:1]
+            results.append({"success": True, "faces": []})
+            probes.extend((i, box, enc) for box, enc in zip(face_locations, face_encodings))
+        
+        # One snapshot for the whole request, even if a reload swaps it meanwhile
+        gallery = self.gallery
+        
+        # Restrict matching to the selected class if specified
+        if department and year and division:
+            rows = gallery.matcher.class_rows(department, year, division)
+        else:
+            rows = None
+        
+        # Match every face from every frame with one gallery query
+        if probes:
+            matches = gallery.matcher.best_matches([enc for _, _, enc in probes], rows)
+        else:
+            matches = []
+        for (i, (top, right, bottom, left), _), (best_name, best_confidence) in zip(probes, matches):
+            result = self.process_match(best_name, best_confidence, session, gallery)
+            print(f"[DEBUG] Name: {result['name']}, Confidence: {best_confidence}, Status: {result['status']}")
+            if group:
+                result["box"] = {"top": int(top), "right": int(right), "bottom": int(bottom), "left": int(left)}
+            results[i]["faces"].append(result)
+        
+        for result in results:
+            if not result["success"]:
+                continue
+            if group:
+                result["face_count"] = len(result["faces"])
+                result["marked_count"] = sum(1 for face in result["faces"] if face["attendance_marked"])
             else:
-                status = "Rejected"
-                decision = "absent"
-                best_name = "Unknown"
-            
-            roll_no = ""
-            attendance_marked = False
-            
-            # Debug info
-            print(f"[DEBUG] Name: {best_name}, Confidence: {best_confidence}, Status: {status}")
-            
-            if best_name != "Unknown":
-                row = self.students_df[self.students_df["Name"].str.lower() == best_name.lower()]
-                if not row.empty:
-                    roll_no = str(row["RollNo"].values[0]).strip()
-                    
-                    if roll_no not in self.marked_students and status == "Accepted":
-                        time_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        try:
-                            with open(self.attendance_file, "a", newline="") as f:
-                                f.write(f"{roll_no},{best_name},{time_now},{best_confidence}%,{status}\n")
-                                f.flush()
-                            print(f"[WRITE OK] Data written to: {os.path.abspath(self.attendance_file)}")
-                        except Exception as e:
-                            print(f"[ERROR] Could not write to file: {e}")
-                        
-                        self.marked_students.add(roll_no)
-                        attendance_marked = True
-                        print(f"[MARKED] {roll_no} - {best_name} ({best_confidence}% - {status})")
-            
-            return {
-                "success": True,
-                "name": best_name,
-                "roll_no": roll_no,
-                "confidence": best_confidence,
-                "status": status,
-                "decision": decision,
-                "attendance_marked": attendance_marked,
-                "already_marked": roll_no in self.marked_students if roll_no else False
-            }
-            
-        except Exception as e:
-            print(f"[ERROR] Recognition failed: {e}")
-            return {"success": False, "error": str(e)}
+                result.update(result.pop("faces")[0])
+        return results
 
 # -----------------------
 # LIVE CAMERA SECTION
 # -----------------------
 def main():
-    system = FaceRecognitionSystem()
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--camera', type=int, default=0)
+    ap.add_argument('--detection_scale', type=float, default=1.0,
+                    help='detect faces on a frame resized by this factor (0-1]')
+    ap.add_argument('--detection_model', choices=DETECTION_MODELS, default='hog')
+    ap.add_argument('--upsample', type=int, default=1,
+                    help='times to upsample the frame when looking for faces')
+    ap.add_argument('--no_tracking', action='store_true',
+                    help='encode every face on every frame instead of tracking them')
+    ap.add_argument('--refresh_interval', type=int, default=30,
+                    help='frames before a confirmed track is re-encoded')
+    ap.add_argument('--pipelined', action='store_true',
+                    help='run capture, recognition and display in separate threads')
+    ap.add_argument('--workers', type=int, default=2,
+                    help='recognition worker threads in pipelined mode')
+    ap.add_argument('--ann', action='store_true',
+                    help='use approximate search when the gallery has at least --ann_min_size students')
+    ap.add_argument('--ann_min_size', type=int, default=2000)
+    ap.add_argument('--ann_nprobe', type=int, default=8,
+                    help='index lists scanned per face; higher is more accurate but slower')
+    args = ap.parse_args()
+    
+    detection = DetectionConfig(args.detection_scale, args.detection_model, args.upsample)
+    ann = AnnConfig(args.ann_min_size, args.ann_nprobe) if args.ann else None
+    system = FaceRecognitionSystem(detection=detection, ann=ann)
+    
+    # Tracks keep each face's identity so it is not re-encoded every frame
+    tracker = None if args.no_tracking else FaceTracker(refresh_interval=args.refresh_interval)
     
-    cap = cv2.VideoCapture(0)
+    if args.pipelined:
+        from live_pipeline import LivePipeline
+        print(f"[INFO] Starting pipelined face recognition with {args.workers} workers... Press 'q' to quit.")
+        try:
+            stats = LivePipeline(system, args.camera, args.workers, tracker).run()
+        finally:
+            # Queued attendance rows are written even on Ctrl+C or an error
+            system.close()
+        print(f"[INFO] Frames captured: {stats['captured']}, processed: {stats['processed']}, "
+              f"displayed: {stats['displayed']}, faces encoded: {stats['encoded_faces']}")
+        print(f"[INFO] Frame queue: peak depth {stats['frame_queue_peak']}, dropped {stats['frame_queue_dropped']}")
+        print(f"[INFO] Result queue: peak depth {stats['result_queue_peak']}, dropped {stats['result_queue_dropped']}")
+        print("[INFO] Attendance marking stopped.")
+        return
+    
+    frame_no = 0
+    encoded_faces = 0
+    
+    cap = cv2.VideoCapture(args.camera)
     print("[INFO] Starting face recognition... Press 'q' to quit.")
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        face_locations = face_recognition.face_locations(rgb_frame)
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-        
-        for face_encoding, face_loc in zip(face_encodings, face_locations):
-            best_confidence = 0
-            best_name = "Unknown"
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_no += 1
             
-            for student_name, baseline_enc in system.baseline_encodings.items():
-                dist = np.linalg.norm(face_encoding - baseline_enc)
-                confidence = round((1 - dist) * 100, 2)
-                if confidence > best_confidence:
-                    best_confidence = confidence
-                    best_name = student_name
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            face_locations = detect_faces(rgb_frame, system.detection)
             
-            # Fuzzy thresholds (≥60 accepted)
-            if best_confidence >= 60:
-                status = "Accepted"
-            elif 40 <= best_confidence < 60:
-                status = "Uncertain"
+            if tracker is None:
+                tracks = [None] * len(face_locations)
+                to_encode = list(range(len(face_locations)))
             else:
-                status = "Rejected"
-                best_name = "Unknown"
+                tracks = tracker.update(face_locations, frame_no)
+                # Only faces that are new, still uncertain or due for a refresh
+                to_encode = [i for i, track in enumerate(tracks) if tracker.needs_encoding(track, frame_no)]
             
-            roll_no = ""
-            if best_name != "Unknown":
-                row = system.students_df[system.students_df["Name"].str.lower() == best_name.lower()]
-                if not row.empty:
-                    roll_no = str(row["RollNo"].values[0]).strip()
-                    
-                    if roll_no not in system.marked_students and status == "Accepted":
-                        time_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        try:
-                            with open(system.attendance_file, "a", newline="") as f:
-                                f.write(f"{roll_no},{best_name},{time_now},{best_confidence}%,{status}\n")
-                                f.flush()
-                            print(f"[WRITE OK] Data written to: {os.path.abspath(system.attendance_file)}")
-                        except Exception as e:
-                            print(f"[ERROR] Could not write to file: {e}")
-                        
-                        system.marked_students.add(roll_no)
-                        print(f"[MARKED] {roll_no} - {best_name} ({best_confidence}% - {status})")
+            labels = {}
+            if to_encode:
+                face_encodings = encode_faces(rgb_frame, [face_locations[i] for i in to_encode])
+                encoded_faces += len(face_encodings)
+                
+                # Match every encoded face in the frame with one gallery query
+                matches = system.matcher.best_matches(face_encodings)
+                for i, (best_name, best_confidence) in zip(to_encode, matches):
+                    result = system.process_match(best_name, best_confidence)
+                    labels[i] = (result["name"], best_confidence)
+                    if tracker is not None:
+                        tracker.assign(tracks[i], result["name"], best_confidence, result["status"], frame_no)
             
-            top, right, bottom, left = face_loc
-            cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
-            cv2.putText(frame, f"{best_name} ({best_confidence}%)", (left, top - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        
-        cv2.imshow("Face Recognition Attendance", frame)
-        
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-    
-    cap.release()
-    cv2.destroyAllWindows()
+            for i, face_loc in enumerate(face_locations):
+                if i in labels:
+                    best_name, best_confidence = labels[i]
+                else:
+                    best_name, best_confidence = tracks[i].name, tracks[i].confidence
+                
+                top, right, bottom, left = face_loc
+                cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
+                cv2.putText(frame, f"{best_name} ({best_confidence}%)", (left, top - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            
+            cv2.imshow("Face Recognition Attendance", frame)
+            
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        cap.release()
+        cv2.destroyAllWindows()
+        # Queued attendance rows are written even on Ctrl+C or an error
+        system.close()
+    print(f"[INFO] Encoded {encoded_faces} faces over {frame_no} frames")
     print("[INFO] Attendance marking stopped.")
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Recall check of the approximate gallery index against exact (brute-force) search
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from ann_index import AnnConfig
+from gallery import GalleryMatcher
+
+STUDENTS = 20000
+PROTOTYPES = 3
+PROBES = 500
+MIN_RECALL = 0.95
+
+
+def make_gallery(rng):
+    """Synthetic students: a random face centre with a few nearby prototypes each"""
+    # Scaled so different students are ~0.9 apart and photos of one student ~0.3
+    centres = rng.normal(0, 0.056, (STUDENTS, 128)).astype(np.float32)
+    prototypes = np.repeat(centres, PROTOTYPES, axis=0)
+    prototypes += rng.normal(0, 0.027, prototypes.shape).astype(np.float32)
+    names = [f"Student {i}" for i in range(STUDENTS)]
+    baselines = {name: prototypes[i * PROTOTYPES:(i + 1) * PROTOTYPES].mean(axis=0) for i, name in enumerate(names)}
+    return centres, baselines, prototypes
+
+
+def main():
+    rng = np.random.default_rng(7)
+    centres, baselines, prototypes = make_gallery(rng)
+    counts = [PROTOTYPES] * STUDENTS
+    people = rng.choice(STUDENTS, PROBES, replace=False)
+    probes = centres[people] + rng.normal(0, 0.027, (PROBES, 128)).astype(np.float32)
+
+    exact = GalleryMatcher(baselines, prototypes=prototypes, prototype_counts=counts)
+    start = time.time()
+    expected = exact.best_matches(probes)
+    exact_time = time.time() - start
+    print(f"Exact search: {STUDENTS} students, {exact_time * 1000 / PROBES:.2f} ms per face")
+
+    # Small galleries must stay exact
+    small = GalleryMatcher(baselines, prototypes=prototypes, prototype_counts=counts,
+                           ann=AnnConfig(min_size=STUDENTS + 1))
+    assert small.index is None, "index built below min_size"
+
+    success = True
+    for nprobe in (1, 4, 8, 16):
+        start = time.time()
+        matcher = GalleryMatcher(baselines, prototypes=prototypes, prototype_counts=counts,
+                                 ann=AnnConfig(min_size=1, nprobe=nprobe))
+        build_time = time.time() - start
+
+        start = time.time()
+        found = matcher.best_matches(probes)
+        search_time = time.time() - start
+        recall = np.mean([f[0] == e[0] for f, e in zip(found, expected)])
+
+        top = matcher.top_k(probes[0], k=5)
+        assert top[0][0] == found[0][0], "top_k and best_matches disagree"
+
+        print(f"nprobe {nprobe:>2}: recall {recall:.3f}, {search_time * 1000 / PROBES:.2f} ms per face "
+              f"(index built in {build_time:.1f}s, {matcher.index.nlist} lists)")
+        if nprobe == AnnConfig().nprobe and recall < MIN_RECALL:
+            print(f"❌ Recall at the default nprobe is below {MIN_RECALL}")
+            success = False
+
+    if success:
+        print("✅ Approximate search matches exact search")
+    return success
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -2,10 +2,7 @@
 Test script to demonstrate encoding cleanup when students are deleted
 """
 
-import pickle
-import os
-
-ENCODINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "encodings.pkl")
+from encodings_store import load_encodings
 
 def simulate_deleted_student():
     """
@@ -22,13 +19,10 @@ def simulate_deleted_student():
     
     # Load current encodings
     try:
-        with open(ENCODINGS_PATH, "rb") as f:
-            data = pickle.load(f)
-            if len(data) == 4:
-                known_encodings, known_names, baseline_encodings, student_class_info = data
-            else:
-                known_encodings, known_names, baseline_encodings = data
-                student_class_info = {}
+        data = load_encodings()
+        known_encodings = data.known_encodings
+        known_names = data.known_names
+        student_class_info = data.student_class_info
         
         print(f"\n📊 Current State:")
         print(f"   - Total encodings: {len(known_encodings)}")
@@ -64,7 +58,7 @@ Step 3: What happens:
 
 Step 4: Result
    ✓ Deleted students will NOT be recognized anymore
-   ✓ Only current students remain in encodings.pkl
+   ✓ Only current students remain in the encodings store
    ✓ System stays synchronized with database
 """)
         
@@ -87,8 +81,8 @@ Step 4: Result
         print("✅ The system is now set up for automatic cleanup!")
         print("=" * 70)
         
-    except FileNotFoundError:
-        print("\n❌ No encodings.pkl found. Run train.py first!")
+    except FileNotFoundError as e:
+        print(f"\n❌ {e}")
     except Exception as e:
         print(f"\n❌ Error: {e}")
 
@@ -34,7 +34,7 @@ def test_file_structure():
     print("\n📁 File Structure Check:")
     
     required_files = [
-        'encodings.pkl',
+        os.path.join('encodings', 'meta.json'),
         'students.csv',
         'recognize.py',
         'face_recognition_server.py',
@@ -117,20 +117,19 @@ def test_encodings():
     print("\n🧠 Face Encodings Check:")
     
     try:
-        import pickle
-        with open('encodings.pkl', 'rb') as f:
-            known_encodings, known_names, baseline_encodings = pickle.load(f)
+        from encodings_store import load_encodings
+        data = load_encodings()
         
         print(f"   ✅ Encodings loaded successfully")
-        print(f"   - Total encodings: {len(known_encodings)}")
-        print(f"   - Unique students: {len(set(known_names))}")
-        print(f"   - Baseline encodings: {len(baseline_encodings)}")
+        print(f"   - Total encodings: {len(data.known_encodings)}")
+        print(f"   - Unique students: {len(set(data.known_names))}")
+        print(f"   - Baseline encodings: {len(data.baseline_names)}")
         
         return True
         
     except Exception as e:
         print(f"   ❌ Error loading encodings: {e}")
-        print("   - Run train.py to generate encodings.pkl")
+        print("   - Run train.py to generate the encodings store")
         return False
 
 def main():
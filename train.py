@@ -1,10 +1,16 @@
 import os
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import cv2
 import face_recognition
-import pickle
 import pandas as pd
 import numpy as np
 import mysql.connector as mysql
+from encodings_store import load_encodings, save_encodings
+from training_cache import TrainingCache
 
 # ----------------------------
 # Paths
@@ -12,7 +18,8 @@ import mysql.connector as mysql
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STUDENTS_DIR = os.path.join(BASE_DIR, "Students")
 STUDENTS_CSV = os.path.join(BASE_DIR, "students.csv")
-ENCODINGS_PATH = os.path.join(BASE_DIR, "encodings.pkl")
+ENCODINGS_DIR = os.path.join(BASE_DIR, "encodings")
+LEGACY_ENCODINGS_PATH = os.path.join(BASE_DIR, "encodings.pkl")
 
 # Database configuration
 DB_HOST = 'localhost'
@@ -20,68 +27,80 @@ DB_NAME = 'smart_attendance'
 DB_USER = 'root'
 DB_PASS = ''
 
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
+
+# Encodings are checkpointed to the training cache at least this often, so an
+# interrupted run resumes from where it stopped
+CHECKPOINT_IMAGES = 100
+CHECKPOINT_SECONDS = 60
+
+# Representative encodings (k-medoids) kept per student for matching, in
+# addition to the mean baseline
+PROTOTYPES = 3
+
+# JPEG decoding at 1/8, 1/4 or 1/2 size, largest reduction first
+REDUCED_READS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
 # ----------------------------
 # Load Student Data from Database
 # ----------------------------
-try:
-    db = mysql.connect(host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME)
-    cursor = db.cursor(dictionary=True)
-    cursor.execute("SELECT name, roll_no, department, class, year, division FROM students")
-    students_data = cursor.fetchall()
-    
-    # Create lookup dictionary: name -> student info
-    students_info = {s['name']: s for s in students_data}
-    valid_names = set(students_info.keys())
-    
-    cursor.close()
-    db.close()
-    print(f"[INFO] Loaded {len(students_info)} students from database")
-except Exception as e:
-    print(f"[ERROR] Failed to load from database: {e}")
-    print("[INFO] Falling back to CSV...")
-    students_df = pd.read_csv(STUDENTS_CSV)
-    valid_names = set(students_df["Name"].values)
-    students_info = {}
+def load_students():
+    """Return (students_info, valid_names) from the database, or from students.csv"""
+    try:
+        db = mysql.connect(host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME)
+        cursor = db.cursor(dictionary=True)
+        cursor.execute("SELECT name, roll_no, department, class, year, division FROM students")
+        students_data = cursor.fetchall()
+        
+        # Create lookup dictionary: name -> student info
+        students_info = {s['name']: s for s in students_data}
+        valid_names = set(students_info.keys())
+        
+        cursor.close()
+        db.close()
+        print(f"[INFO] Loaded {len(students_info)} students from database")
+    except Exception as e:
+        print(f"[ERROR] Failed to load from database: {e}")
+        print("[INFO] Falling back to CSV...")
+        students_df = pd.read_csv(STUDENTS_CSV)
+        valid_names = set(students_df["Name"].values)
+        students_info = {}
+    return students_info, valid_names
 
 # ----------------------------
 # Clean up old encodings if they exist
 # ----------------------------
-if os.path.exists(ENCODINGS_PATH):
+def load_old_encodings(valid_names):
+    """Previous encodings (or None), reporting students that were deleted since"""
     try:
-        with open(ENCODINGS_PATH, "rb") as f:
-            old_data = pickle.load(f)
-            if len(old_data) == 4:
-                old_known_encodings, old_known_names, old_baseline_encodings, old_student_class_info = old_data
-            else:
-                old_known_encodings, old_known_names, old_baseline_encodings = old_data
-                old_student_class_info = {}
-        
-        old_students = set(old_known_names)
-        current_students = valid_names
-        deleted_students = old_students - current_students
-        
-        if deleted_students:
-            print(f"[INFO] Detected {len(deleted_students)} deleted student(s): {deleted_students}")
-            print("[INFO] Old encodings will be cleaned up...")
-        else:
-            print("[INFO] No deleted students detected.")
+        old_data = load_encodings(ENCODINGS_DIR, LEGACY_ENCODINGS_PATH)
+    except FileNotFoundError:
+        # First run, or only a legacy encodings.pkl: every student gets a new baseline
+        return None
     except Exception as e:
         print(f"[WARNING] Could not read old encodings: {e}")
+        return None
+    
+    deleted_students = set(old_data.known_names) - valid_names
+    if deleted_students:
+        print(f"[INFO] Detected {len(deleted_students)} deleted student(s): {deleted_students}")
+        print("[INFO] Old encodings will be cleaned up...")
+    else:
+        print("[INFO] No deleted students detected.")
+    return old_data
 
 # ----------------------------
-# Prepare Encodings with Class Information
+# Discover
 # ----------------------------
-known_encodings = []
-known_names = []
-baseline_encodings = {}  # store average encoding per student
-student_class_info = {}  # store class info: name -> {dept, year, div}
-
-print("[INFO] Training started...")
-
-# Walk through hierarchical structure: Students/Department/Year/Division/StudentName/
-for root, dirs, files in os.walk(STUDENTS_DIR):
-    # Check if this is a student folder (contains images)
-    if files and any(f.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')) for f in files):
+def discover(valid_names, students_dir=STUDENTS_DIR):
+    """Return (student_name, folder, image paths) for every known student's folder"""
+    folders = []
+    # Walk through hierarchical structure: Students/Department/Year/Division/StudentName/
+    for root, dirs, files in os.walk(students_dir):
+        # Check if this is a student folder (contains images)
+        img_names = [f for f in files if f.lower().endswith(IMAGE_EXTENSIONS)]
+        if not img_names:
+            continue
         # Extract student name from the path
         student_name = os.path.basename(root)
         
@@ -89,9 +108,219 @@ for root, dirs, files in os.walk(STUDENTS_DIR):
         if student_name not in valid_names:
             print(f"[WARNING] '{student_name}' folder does not match any Name in database!")
             continue
-        
+        folders.append((student_name, root, [os.path.join(root, f) for f in img_names]))
+    return folders
+
+# ----------------------------
+# Encode (image work runs in worker processes with --workers)
+# ----------------------------
+def load_image(img_path, max_side=0):
+    """Read an image as BGR with its longer side capped at max_side (0 = full size).
+    
+    Large photos are decoded at a reduced size straight from the file, which
+    is much cheaper than decoding at full resolution and resizing.
+    """
+    if max_side <= 0:
+        return cv2.imread(img_path)
+    preview = cv2.imread(img_path, cv2.IMREAD_REDUCED_COLOR_8)
+    if preview is None:
+        return None
+    full_side = max(preview.shape[:2]) * 8
+    for factor, flag in REDUCED_READS:
+        if full_side // factor >= max_side:
+            img = preview if factor == 8 else cv2.imread(img_path, flag)
+            break
+    else:
+        img = cv2.imread(img_path)
+    
+    side = max(img.shape[:2])
+    if side > max_side:
+        scale = max_side / side
+        img = cv2.resize(img, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return img
+
+def scale_boxes(boxes, from_shape, to_shape):
+    """Map (top, right, bottom, left) boxes between two resolutions of an image"""
+    sy = to_shape[0] / from_shape[0]
+    sx = to_shape[1] / from_shape[1]
+    height, width = to_shape[:2]
+    return [(max(0, int(round(top * sy))), min(width, int(round(right * sx))),
+             min(height, int(round(bottom * sy))), max(0, int(round(left * sx))))
+            for top, right, bottom, left in boxes]
+
+def encode_image(img_path, max_side=0, full_res_crops=False):
+    """Return (face encodings or None if unreadable, timing stats) for one image.
+    
+    With max_side, faces are detected (and by default encoded) on the reduced
+    image; full_res_crops encodes the detected boxes on the full-size image.
+    """
+    start = time.time()
+    stats = {"path": img_path, "bytes": os.path.getsize(img_path), "size": None, "faces": 0}
+    img = load_image(img_path, max_side)
+    if img is None:
+        stats["seconds"] = time.time() - start
+        return None, stats
+    
+    rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    boxes = face_recognition.face_locations(rgb_img)
+    if full_res_crops and max_side > 0 and boxes:
+        full_img = cv2.imread(img_path)
+        if full_img is not None and full_img.shape[:2] != img.shape[:2]:
+            boxes = scale_boxes(boxes, img.shape, full_img.shape)
+            rgb_img = cv2.cvtColor(full_img, cv2.COLOR_BGR2RGB)
+    encodings = face_recognition.face_encodings(rgb_img, boxes)
+    
+    stats.update(size=f"{rgb_img.shape[1]}x{rgb_img.shape[0]}", faces=len(encodings),
+                 seconds=time.time() - start)
+    return encodings, stats
+
+def encode_folder(img_paths, max_side=0, full_res_crops=False):
+    """Encode the images of one student folder; one (encodings, stats) pair per path"""
+    return [encode_image(img_path, max_side, full_res_crops) for img_path in img_paths]
+
+def encode(folders, cache, students_dir=STUDENTS_DIR, workers=1,
+           checkpoint_images=CHECKPOINT_IMAGES, checkpoint_seconds=CHECKPOINT_SECONDS,
+           max_side=0, full_res_crops=False, timings=None):
+    """Yield (student_name, folder, images) per folder, in order.
+    
+    ``images`` holds (image path, encodings or None if unreadable, reused)
+    tuples. Images found in the cache, unreadable ones included, are not
+    encoded again. New results are stored in the cache, which is saved every
+    ``checkpoint_images`` encoded images or ``checkpoint_seconds`` seconds and
+    when encoding stops early, so a rerun after a crash or Ctrl+C only encodes
+    what is left. Timing stats of every encoded image are appended to
+    ``timings`` if given.
+    """
+    # Look every image up in the cache first; only the misses are encoded
+    pending = []
+    for student_name, root, img_paths in folders:
+        cached = {}
+        for img_path in img_paths:
+            found, encodings = cache.lookup(os.path.relpath(img_path, students_dir), img_path)
+            if found:
+                cached[img_path] = encodings
+        pending.append((student_name, root, img_paths, cached, [p for p in img_paths if p not in cached]))
+    
+    to_encode = [misses for _, _, _, _, misses in pending]
+    remaining = sum(map(len, to_encode))
+    if cache.reused and remaining:
+        print(f"[INFO] Reusing {cache.reused} cached images; {remaining} left to encode")
+    
+    executor = None
+    futures = []
+    if workers > 1 and remaining:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        print(f"[INFO] Encoding {remaining} images with {workers} worker processes")
+        # Results are consumed in submission order, so the gallery matches a serial run
+        futures = [executor.submit(encode_folder, misses, max_side, full_res_crops) for misses in to_encode]
+        results = (future.result() for future in futures)
+    else:
+        results = map(partial(encode_folder, max_side=max_side, full_res_crops=full_res_crops), to_encode)
+    
+    unsaved = 0
+    last_checkpoint = time.time()
+    try:
+        for (student_name, root, img_paths, cached, misses), encoded in zip(pending, results):
+            if timings is not None:
+                timings.extend(stats for _, stats in encoded)
+            encoded = dict(zip(misses, (encodings for encodings, _ in encoded)))
+            images = []
+            for img_path in img_paths:
+                if img_path in cached:
+                    images.append((img_path, cached[img_path], True))
+                    continue
+                encodings = encoded[img_path]
+                # Unreadable images are stored too, so they are not decoded again next run
+                cache.store(os.path.relpath(img_path, students_dir), img_path, encodings)
+                unsaved += 1
+                images.append((img_path, encodings, False))
+            
+            if unsaved and (unsaved >= checkpoint_images or time.time() - last_checkpoint >= checkpoint_seconds):
+                cache.save()
+                unsaved = 0
+                last_checkpoint = time.time()
+            yield student_name, root, images
+    finally:
+        if executor is not None:
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
+        if unsaved:
+            # Keep the finished images for the next run even if training stopped early
+            cache.save()
+
+# ----------------------------
+# Aggregate
+# ----------------------------
+def select_prototypes(encodings, k=PROTOTYPES, iterations=10):
+    """Pick up to k medoids that represent a student's encodings under different poses and lighting.
+    
+    Starts from the most central encoding, adds the farthest ones, then
+    refines with k-medoids (each cluster keeps its most central member).
+    """
+    X = np.asarray(encodings, dtype=np.float64)
+    if len(X) <= k:
+        return X
+    D = np.linalg.norm(X[:, None, :] - X[None, :, :], axis=2)
+    
+    medoids = [int(np.argmin(D.sum(axis=1)))]
+    while len(medoids) < k:
+        nearest = D[:, medoids].min(axis=1)
+        if nearest.max() == 0:
+            # The remaining encodings duplicate the chosen ones
+            break
+        medoids.append(int(np.argmax(nearest)))
+    
+    for _ in range(iterations):
+        labels = np.argmin(D[:, medoids], axis=1)
+        updated = []
+        for cluster, medoid in enumerate(medoids):
+            members = np.flatnonzero(labels == cluster)
+            if len(members) == 0:
+                updated.append(medoid)
+                continue
+            updated.append(int(members[np.argmin(D[np.ix_(members, members)].sum(axis=1))]))
+        if updated == medoids:
+            break
+        medoids = updated
+    return X[sorted(set(medoids))]
+
+class TrainingResult:
+    """Encodings, baselines and class info produced by aggregate()"""
+    
+    def __init__(self):
+        self.known_encodings = []
+        self.known_names = []
+        self.baseline_encodings = {}  # store average encoding per student
+        self.student_class_info = {}  # store class info: name -> {dept, year, div}
+        self.prototypes = {}  # name -> (k, 128) representative encodings
+        self.baselines_reused = 0
+        # Filled in by train()
+        self.images_reused = 0
+        self.images_encoded = 0
+        self.images_dropped = 0
+        self.old_students = None  # students in the previous encodings, if any
+        self.current_students = set()
+        self.timings = []  # per encoded image: path, bytes, size, faces, seconds
+        self.students_dir = STUDENTS_DIR  # folder the images were read from
+
+def aggregate(encoded_folders, students_info, old_data=None, students_dir=STUDENTS_DIR, prototypes=PROTOTYPES):
+    """Collect per-image encodings into per-face lists, baselines, prototypes and class info.
+    
+    A student's prototypes are their mean baseline followed by up to
+    ``prototypes`` medoids. The baseline is always one of them, so the
+    closest-prototype distance is never larger than the distance to the mean
+    that the confidence thresholds were tuned on. With prototypes=0 students
+    are matched by their mean baseline only.
+    """
+    result = TrainingResult()
+    old_baselines = old_data.baseline_encodings if old_data is not None else {}
+    old_prototypes = old_data.prototypes if old_data is not None else {}
+    old_counts = Counter(old_data.known_names) if old_data is not None else Counter()
+    
+    for student_name, root, images in encoded_folders:
         # Extract class info from path
-        path_parts = root.replace(STUDENTS_DIR, '').strip(os.sep).split(os.sep)
+        path_parts = root.replace(students_dir, '').strip(os.sep).split(os.sep)
         if len(path_parts) >= 3:
             dept_from_path = path_parts[0]
             year_from_path = path_parts[1]
@@ -101,72 +330,175 @@ for root, dirs, files in os.walk(STUDENTS_DIR):
             print(f"[PROCESSING] {student_name}...")
         
         student_encodings = []
-        
-        for img_name in files:
-            if not img_name.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')):
+        student_changed = False
+        for img_path, encodings, reused in images:
+            if encodings is None:
+                print(f"[SKIPPED] {os.path.basename(img_path)} (invalid image)")
                 continue
-                
-            img_path = os.path.join(root, img_name)
-            img = cv2.imread(img_path)
-            if img is None:
-                print(f"[SKIPPED] {img_name} (invalid image)")
-                continue
-            
-            rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            boxes = face_recognition.face_locations(rgb_img)
-            encodings = face_recognition.face_encodings(rgb_img, boxes)
-            
+            student_changed = student_changed or not reused
             for enc in encodings:
-                known_encodings.append(enc)
-                known_names.append(student_name)
+                result.known_encodings.append(enc)
+                result.known_names.append(student_name)
                 student_encodings.append(enc)
-
+        
         if student_encodings:
-            # Compute average encoding for fuzzy baseline
-            baseline_encodings[student_name] = np.mean(student_encodings, axis=0)
+            # Same images as last time (none new, changed or deleted): keep the old baseline
+            unchanged = (not student_changed and student_name in old_baselines
+                         and old_counts[student_name] == len(student_encodings))
+            if unchanged:
+                result.baseline_encodings[student_name] = old_baselines[student_name]
+                result.baselines_reused += 1
+            else:
+                # Compute average encoding for fuzzy baseline
+                result.baseline_encodings[student_name] = np.mean(student_encodings, axis=0)
+            if prototypes > 0:
+                baseline = result.baseline_encodings[student_name]
+                old_rows = old_prototypes.get(student_name)
+                # Old rows are reused if they were built with this setting and start with the baseline
+                if (unchanged and old_rows is not None and len(old_rows) == min(len(student_encodings), prototypes) + 1
+                        and np.array_equal(old_rows[0], baseline)):
+                    result.prototypes[student_name] = old_rows
+                else:
+                    result.prototypes[student_name] = np.vstack(
+                        [baseline, select_prototypes(student_encodings, prototypes)])
             
             # Store class information
             if student_name in students_info:
-                student_class_info[student_name] = {
-                    'department': students_info[student_name].get('department') or students_info[student_name].get('class', ''),
-                    'year': students_info[student_name].get('year', ''),
-                    'division': students_info[student_name].get('division', ''),
-                    'roll_no': students_info[student_name].get('roll_no', '')
+                info = students_info[student_name]
+                result.student_class_info[student_name] = {
+                    'department': info.get('department') or info.get('class', ''),
+                    'year': info.get('year', ''),
+                    'division': info.get('division', ''),
+                    'roll_no': info.get('roll_no', '')
                 }
-                print(f"[INFO] Baseline encoding computed for {student_name} ({student_class_info[student_name]['department']} {student_class_info[student_name]['year']} {student_class_info[student_name]['division']})")
+                class_info = result.student_class_info[student_name]
+                print(f"[INFO] Baseline encoding computed for {student_name} ({class_info['department']} {class_info['year']} {class_info['division']})")
             else:
                 print(f"[INFO] Baseline encoding computed for {student_name}")
-
-print(f"[INFO] Training completed. Encoded {len(known_names)} faces.")
+    return result
 
 # ----------------------------
 # Save Encodings + Baseline + Class Info
 # ----------------------------
-with open(ENCODINGS_PATH, "wb") as f:
-    pickle.dump((known_encodings, known_names, baseline_encodings, student_class_info), f)
+def save(result, cache, encodings_dir=ENCODINGS_DIR):
+    """Write the encodings store and the training cache"""
+    save_encodings(result.known_encodings, result.known_names, result.baseline_encodings,
+                   result.student_class_info, encodings_dir, result.prototypes)
+    cache.save()
+    print(f"[INFO] Encodings saved to {encodings_dir}")
 
-print(f"[INFO] Encodings saved to {ENCODINGS_PATH}")
-print(f"[INFO] Saved class information for {len(student_class_info)} students")
+def train(workers=1, students_dir=STUDENTS_DIR, encodings_dir=ENCODINGS_DIR, max_side=0, full_res_crops=False,
+          prototypes=PROTOTYPES):
+    """Run the whole pipeline: discover, encode, aggregate and save.
+    
+    Returns a TrainingResult. An interrupted run keeps its checkpointed
+    images, so calling train() again resumes the work.
+    """
+    students_info, valid_names = load_students()
+    old_data = load_old_encodings(valid_names)
+    
+    # Encodings of images that are unchanged since the last run are reused
+    settings = {"model": "hog", "upsample": 1}
+    if max_side > 0:
+        # Encodings depend on the decode size, so they are cached per setting
+        settings.update(max_side=max_side, full_res_crops=full_res_crops)
+    cache = TrainingCache(encodings_dir, settings=settings)
+    
+    print("[INFO] Training started...")
+    folders = discover(valid_names, students_dir)
+    
+    timings = []
+    encoded = encode(folders, cache, students_dir, workers,
+                     max_side=max_side, full_res_crops=full_res_crops, timings=timings)
+    try:
+        result = aggregate(_with_progress(encoded, len(folders)), students_info, old_data, students_dir,
+                           prototypes)
+    finally:
+        encoded.close()
+    print(f"[INFO] Training completed. Encoded {len(result.known_names)} faces.")
+    
+    result.images_reused = cache.reused
+    result.images_encoded = cache.recomputed
+    result.images_dropped = len(cache.removed())
+    result.old_students = set(old_data.known_names) if old_data is not None else None
+    result.current_students = valid_names
+    result.timings = timings
+    result.students_dir = students_dir
+    save(result, cache, encodings_dir)
+    return result
 
-# ----------------------------
-# Show Summary
-# ----------------------------
-print("\n" + "="*60)
-print("TRAINING SUMMARY")
-print("="*60)
-print(f"Total unique students encoded: {len(set(known_names))}")
-print(f"Total face encodings: {len(known_encodings)}")
-print(f"Baseline encodings: {len(baseline_encodings)}")
-print(f"Students with class info: {len(student_class_info)}")
-
-if 'old_students' in locals() and 'current_students' in locals():
-    deleted = old_students - current_students
-    added = current_students - old_students
-    
-    if deleted:
-        print(f"\n🗑️  Removed encodings for: {', '.join(sorted(deleted))}")
-    if added:
-        print(f"✅ Added encodings for: {', '.join(sorted(added))}")
-    if not deleted and not added:
-        print("\n✅ All encodings are up to date (no changes)")
-print("="*60)
+def _with_progress(encoded_folders, total):
+    for done, folder in enumerate(encoded_folders, 1):
+        yield folder
+        print(f"[PROGRESS] {done}/{total} students")
+
+def print_summary(result):
+    """Print the training summary"""
+    print("\n" + "="*60)
+    print("TRAINING SUMMARY")
+    print("="*60)
+    print(f"Total unique students encoded: {len(set(result.known_names))}")
+    print(f"Total face encodings: {len(result.known_encodings)}")
+    print(f"Baseline encodings: {len(result.baseline_encodings)}")
+    print(f"Students with class info: {len(result.student_class_info)}")
+    print(f"Images reused from cache: {result.images_reused}, encoded: {result.images_encoded}, "
+          f"dropped: {result.images_dropped}")
+    print(f"Prototypes: {sum(len(p) for p in result.prototypes.values())} "
+          f"(of {len(result.known_encodings)} face encodings)")
+    print(f"Baselines reused: {result.baselines_reused}, "
+          f"recomputed: {len(result.baseline_encodings) - result.baselines_reused}")
+    
+    if result.old_students is not None:
+        deleted = result.old_students - result.current_students
+        added = result.current_students - result.old_students
+        
+        if deleted:
+            print(f"\n🗑️  Removed encodings for: {', '.join(sorted(deleted))}")
+        if added:
+            print(f"✅ Added encodings for: {', '.join(sorted(added))}")
+        if not deleted and not added:
+            print("\n✅ All encodings are up to date (no changes)")
+    print("="*60)
+
+def print_timing_report(timings, top=10, students_dir=STUDENTS_DIR):
+    """Print the slowest images with their file size and the resolution they were encoded at.
+    
+    Paths are shown relative to ``students_dir`` (pass result.students_dir).
+    """
+    if not timings:
+        print("[INFO] No images were encoded in this run")
+        return
+    total = sum(t["seconds"] for t in timings)
+    print("\n" + "="*60)
+    print(f"SLOWEST IMAGES ({len(timings)} encoded in {total:.1f}s, {total / len(timings):.2f}s per image)")
+    print("="*60)
+    for t in sorted(timings, key=lambda t: t["seconds"], reverse=True)[:top]:
+        print(f"{t['seconds']:7.2f}s  {t['bytes'] / 1e6:6.1f} MB  {t['size'] or 'unreadable':>11}  "
+              f"{t['faces']} face(s)  {os.path.relpath(t['path'], students_dir)}")
+    print("="*60)
+
+def main():
+    ap = argparse.ArgumentParser(description="Train face encodings from the Students/ folder")
+    ap.add_argument('--workers', type=int, default=1,
+                    help='processes used to encode images (one student folder per task)')
+    ap.add_argument('--max_side', type=int, default=0,
+                    help='decode photos with their longer side capped at this many pixels (0 = full size)')
+    ap.add_argument('--full_res_crops', action='store_true',
+                    help='with --max_side, detect on the small image but encode the faces at full resolution')
+    ap.add_argument('--prototypes', type=int, default=PROTOTYPES,
+                    help='representative encodings kept per student besides the mean (0 = mean baseline only)')
+    ap.add_argument('--timing_report', type=int, default=0, metavar='N',
+                    help='print the N slowest images with their size')
+    args = ap.parse_args()
+    
+    result = train(workers=args.workers, max_side=args.max_side, full_res_crops=args.full_res_crops,
+                   prototypes=args.prototypes)
+    if os.path.exists(LEGACY_ENCODINGS_PATH):
+        print(f"[INFO] {LEGACY_ENCODINGS_PATH} is no longer used and can be deleted")
+    print(f"[INFO] Saved class information for {len(result.student_class_info)} students")
+    print_summary(result)
+    if args.timing_report:
+        print_timing_report(result.timings, args.timing_report, result.students_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Per-image cache of face encodings for incremental training
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from encodings_store import ENCODING_DIM
+
+CACHE_VERSION = 1
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TrainingCache:
+    """Encodings of every training image, keyed by its path under Students/.
+
+    An entry is reused while the image's size and modification time are
+    unchanged; if only those changed (e.g. the file was copied again) the
+    content hash decides. Unreadable images are remembered too (with no
+    encodings), so they are not decoded again until the file changes. The
+    cache is saved as JSON metadata plus one float32 .npy matrix, and is
+    discarded entirely when the detection ``settings`` it was built with
+    differ from the current ones.
+    """
+
+    def __init__(self, cache_dir, settings=None):
+        self.meta_path = os.path.join(cache_dir, "train_cache.json")
+        self.matrix_path = os.path.join(cache_dir, "train_cache.npy")
+        self.settings = settings or {}
+        self.entries = {}
+        self.reused = 0
+        self.recomputed = 0
+        self._seen = set()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            matrix = np.load(self.matrix_path)
+        except (OSError, ValueError) as e:
+            if os.path.exists(self.meta_path):
+                print(f"[WARNING] Ignoring unreadable training cache: {e}")
+            return
+        if meta.get("version") != CACHE_VERSION or meta.get("settings") != self.settings:
+            print("[INFO] Training settings changed; re-encoding every image")
+            return
+        if meta.get("rows") != len(matrix):
+            print("[WARNING] Training cache is incomplete; re-encoding every image")
+            return
+        for rel_path, entry in meta["images"].items():
+            start, count = entry["rows"]
+            entry["encodings"] = None if entry.get("unreadable") else list(matrix[start:start + count])
+            self.entries[rel_path] = entry
+
+    def lookup(self, rel_path, path):
+        """Return (found, encodings) for an image; found is False if it must be encoded.
+
+        encodings is None for an image that was cached as unreadable.
+        """
+        self._seen.add(rel_path)
+        entry = self.entries.get(rel_path)
+        if entry is None:
+            return False, None
+        stat = os.stat(path)
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            self.reused += 1
+            return True, entry["encodings"]
+        if entry["size"] == stat.st_size and entry["sha1"] == file_digest(path):
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self.reused += 1
+            return True, entry["encodings"]
+        return False, None
+
+    def store(self, rel_path, path, encodings):
+        """Remember the encodings just computed for an image (None if it was unreadable)"""
+        self._seen.add(rel_path)
+        stat = os.stat(path)
+        self.entries[rel_path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha1": file_digest(path),
+            "encodings": None if encodings is None else list(encodings),
+        }
+        self.recomputed += 1
+
+    def removed(self):
+        """Cached images that were not looked up in this run (deleted or skipped)"""
+        return set(self.entries) - self._seen
+
+    def save(self):
+        """Write the cache, dropping images that were not part of this run"""
+        images = {}
+        rows = []
+        for rel_path in sorted(self._seen & set(self.entries)):
+            entry = self.entries[rel_path]
+            encodings = entry["encodings"] or []
+            images[rel_path] = {
+                "size": entry["size"],
+                "mtime_ns": entry["mtime_ns"],
+                "sha1": entry["sha1"],
+                "rows": [len(rows), len(encodings)],
+            }
+            if entry["encodings"] is None:
+                images[rel_path]["unreadable"] = True
+            rows.extend(encodings)
+
+        matrix = np.asarray(rows, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        os.makedirs(os.path.dirname(self.meta_path), exist_ok=True)
+        np.save(self.matrix_path + ".tmp.npy", matrix)
+        os.replace(self.matrix_path + ".tmp.npy", self.matrix_path)
+        meta = {"version": CACHE_VERSION, "settings": self.settings, "rows": len(matrix), "images": images}
+        with open(self.meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(self.meta_path + ".tmp", self.meta_path)